@@ -0,0 +1,107 @@
+import argparse
+import random
+
+from lxml import etree
+
+# Уровни вложенности секций, как в реальных каталогах ФЕР
+SECTION_TYPES = ('Сборник', 'Отдел', 'Раздел', 'Таблица')
+PRICE_FIELDS = ('Cost', 'SalaryMach', 'Salary', 'Machines', 'Materials')
+WORDS = ('разработка', 'грунта', 'бетона', 'устройство', 'монтаж', 'конструкций', 'стальных', 'труб', 'кладка',
+         'стен', 'кирпича', 'покрытий', 'изоляции', 'окраска', 'поверхностей', 'демонтаж', 'оборудования')
+
+
+def generate_catalog(path, works=10000, branching=(4, 3, 3), name_groups=2, works_per_group=5, items=4,
+                     resources=8, dictionary_size=5000, seed=0):
+    """Записывает синтетический каталог в грамматике, которую читает загрузчик.
+
+    Файл пишется потоково, поэтому размер каталога ограничен только диском. Сборников создается
+    столько, чтобы при заданном ветвлении Отдел/Раздел/Таблица получилось не меньше works работ.
+    Коды ресурсов и тексты позиций берутся из общего пула dictionary_size, чтобы дедупликация
+    справочников работала так же, как на реальных данных.
+    """
+    rng = random.Random(seed)
+    works_per_table = name_groups * works_per_group
+    tables_per_collection = 1
+    for count in branching:
+        tables_per_collection *= count
+    collections = max(1, -(-works // (works_per_table * tables_per_collection)))
+    counters = {'works': 0}
+
+    def text(words, source=rng):
+        return ' '.join(source.choice(WORDS) for _ in range(words))
+
+    def pooled_text(number, words):
+        # Одна и та же запись пула всегда получает одинаковый текст
+        return text(words, random.Random(number))
+
+    def write_work(xf, code):
+        counters['works'] += 1
+        with xf.element('Work', Code=code, EndName=text(3), MeasureUnit=rng.choice(('100 м3', '1 т', '10 м2'))):
+            with xf.element('NrSp'):
+                xf.write(etree.Element('ReasonItem', Nr=str(rng.randint(50, 150)), Sp=str(rng.randint(30, 100))))
+            with xf.element('Content'):
+                for number in rng.sample(range(dictionary_size), items):
+                    xf.write(etree.Element('Item', Text=f'Позиция {number}: {pooled_text(number, 6)}'))
+            with xf.element('Resources'):
+                for number in rng.sample(range(dictionary_size), resources):
+                    kind = number % 10
+                    if kind < 7:
+                        xf.write(etree.Element('Resource', Code=f'{number // 100:02d}.1.01.01-{number:04d}',
+                                               EndName=pooled_text(number, 4), Quantity=f'{rng.uniform(0.01, 100):.2f}',
+                                               MeasureUnit='т'))
+                    elif kind < 9:
+                        xf.write(etree.Element('AbstractResource', Code=f'1-{number:04d}', Name=pooled_text(number, 3),
+                                               Quantity='П', MeasureUnit='м3'))
+                    else:
+                        xf.write(etree.Element('ServiceResource', Code=f'{number}', Category='ЗТР',
+                                               Name=pooled_text(number, 2), Quantity=f'{rng.uniform(1, 500):.2f}',
+                                               MeasureUnit='чел.-ч', Type='Трудозатраты'))
+            with xf.element('Prices'):
+                values = {field: f'{rng.uniform(10, 100000):.2f}' for field in PRICE_FIELDS}
+                with xf.element('Price', **values):
+                    if rng.random() < 0.2:
+                        xf.write(etree.Element('Correction', Coeff=f'{rng.uniform(0.8, 1.5):.2f}',
+                                               From=rng.choice(PRICE_FIELDS), To=rng.choice(PRICE_FIELDS)))
+
+    def write_section(xf, level, code):
+        section_type = SECTION_TYPES[level]
+        with xf.element('Section', Type=section_type, Code=code, Name=text(4).upper()):
+            if level == len(SECTION_TYPES) - 1:
+                for group in range(name_groups):
+                    with xf.element('NameGroup', BeginName=text(3).capitalize()):
+                        for number in range(1, works_per_group + 1):
+                            write_work(xf, f'{code}-{group * works_per_group + number:02d}')
+                return
+            for number in range(1, branching[level] + 1):
+                write_section(xf, level + 1, f'{code}-{number:02d}' if level else f'{code}-{number:03d}')
+
+    with etree.xmlfile(path, encoding='utf-8') as xf:
+        xf.write_declaration()
+        with xf.element('Base', PriceLevel='01.01.2000', CreationDate='2024-07-01', CreationTime='12:00:00',
+                        ProgramName='generate_catalog', BaseName='Синтетический', BaseType='ФЕР'):
+            with xf.element('Decrees'):
+                xf.write(etree.Element('Decree', Name='Синтетический каталог для нагрузочных тестов'))
+            with xf.element('ResourcesDirectory'):
+                with xf.element('ResourceCategory', Type='Работы', CodePrefix='ФЕР'):
+                    for number in range(1, collections + 1):
+                        write_section(xf, 0, f'{number:02d}')
+
+    return counters['works']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Генерация синтетического XML-каталога для бенчмарков загрузчика')
+    parser.add_argument('path', help='файл, в который будет записан каталог')
+    parser.add_argument('--works', type=int, default=10000, help='минимальное количество работ')
+    parser.add_argument('--items', type=int, default=4, help='позиций состава на работу')
+    parser.add_argument('--resources', type=int, default=8, help='ресурсов на работу')
+    parser.add_argument('--dictionary-size', type=int, default=5000, help='размер пула кодов ресурсов и позиций')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    written = generate_catalog(args.path, args.works, items=args.items, resources=args.resources,
+                               dictionary_size=args.dictionary_size, seed=args.seed)
+    print(f"{args.path}: {written} works")
@@ -0,0 +1,116 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from .generate_catalog import generate_catalog
+
+
+def _peak_rss_mb():
+    # На Linux ru_maxrss возвращается в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def phase_parse(xml_file):
+    """Только потоковый разбор: нижняя граница времени любого импорта."""
+    from migrate_xml_to_pg.streaming import iter_catalog
+
+    started = time.perf_counter()
+    events = {}
+    for tag, element in iter_catalog(xml_file):
+        events[tag] = events.get(tag, 0) + 1
+    return {'seconds': time.perf_counter() - started, 'peak_rss_mb': _peak_rss_mb(), 'rows': events}
+
+
+def phase_dictionaries(xml_file):
+    """Сбор справочников, как в первом проходе параллельного импорта."""
+    from migrate_xml_to_pg.parallel import collect_dictionaries
+
+    started = time.perf_counter()
+    entries = collect_dictionaries(xml_file)
+    return {'seconds': time.perf_counter() - started, 'peak_rss_mb': _peak_rss_mb(),
+            'rows': {table: len(values) for table, values in entries.items()}}
+
+
+def phase_import(xml_file, batch_size):
+    """Полный импорт в базу из DATABASE_URL."""
+    from migrate_xml_to_pg.load_data import Base, CatalogImporter, engine
+
+    Base.metadata.create_all(engine)
+    connection = engine.raw_connection()
+    try:
+        started = time.perf_counter()
+        importer = CatalogImporter(connection, batch_size)
+        importer.run(xml_file)
+        seconds = time.perf_counter() - started
+    finally:
+        connection.close()
+    summary = importer.metrics.summary()
+    return {'seconds': seconds, 'peak_rss_mb': _peak_rss_mb(), 'rows': summary['rows'],
+            'phase_seconds': summary['phase_seconds']}
+
+
+def run_phase(function, *args):
+    """Запускает фазу в отдельном процессе, чтобы пиковая память не накапливалась между фазами."""
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(function, args)
+
+
+def benchmark(works_sizes, batch_size, with_import, keep_dir=None):
+    results = []
+    directory = keep_dir or tempfile.mkdtemp(prefix='catalog_benchmark_')
+    for works in works_sizes:
+        xml_file = os.path.join(directory, f'catalog_{works}.xml')
+        started = time.perf_counter()
+        written = generate_catalog(xml_file, works)
+        result = {
+            'works': written,
+            'file_mb': os.path.getsize(xml_file) / 1024 / 1024,
+            'generate_seconds': time.perf_counter() - started,
+            'phases': {
+                'parse': run_phase(phase_parse, xml_file),
+                'dictionaries': run_phase(phase_dictionaries, xml_file),
+            },
+        }
+        if with_import:
+            result['phases']['import'] = run_phase(phase_import, xml_file, batch_size)
+        for phase in result['phases'].values():
+            total = sum(phase['rows'].values())
+            phase['rows_per_second'] = total / phase['seconds'] if phase['seconds'] else None
+        results.append(result)
+        if keep_dir is None:
+            os.remove(xml_file)
+    if keep_dir is None:
+        os.rmdir(directory)
+    return results
+
+
+def print_report(results):
+    print(f"{'works':>8} {'file MB':>8} {'phase':>13} {'seconds':>9} {'rows/s':>11} {'peak RSS MB':>12}")
+    for result in results:
+        for name, phase in result['phases'].items():
+            print(f"{result['works']:>8} {result['file_mb']:>8.1f} {name:>13} {phase['seconds']:>9.2f} "
+                  f"{phase['rows_per_second'] or 0:>11.0f} {phase['peak_rss_mb']:>12.1f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Бенчмарк загрузчика на синтетических каталогах')
+    parser.add_argument('--works', type=int, nargs='+', default=[10000, 50000],
+                        help='размеры каталогов в работах; несколько значений показывают, растет ли память')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--no-import', action='store_true', help='не писать в базу, измерить только разбор')
+    parser.add_argument('--keep-dir', help='сохранить сгенерированные каталоги в этом каталоге')
+    parser.add_argument('--json', help='записать результаты в JSON-файл')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    results = benchmark(args.works, args.batch_size or None, not args.no_import, args.keep_dir)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import json
+import random
+import timeit
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.models import Section, NameGroup, Work, WorkDetail, Item, WorkResourceData
+from src.serialization import dumps
+from src.services import SectionService
+
+WORDS = ('разработка', 'грунта', 'бетона', 'устройство', 'монтаж', 'конструкций', 'стальных', 'труб', 'кладка')
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def generate_rows(rows, seed=0):
+    """Строки базы в формате запросов queries.py для каждого эндпоинта."""
+    rng = random.Random(seed)
+    sections = [(1, _text(rng, 4).upper(), 'Сборник', '1', None)]
+    for section_id in range(2, rows + 1):
+        # Дерево с ветвлением 8, как результат /search: Сборник/Отдел/Раздел/Таблица
+        sections.append((section_id, _text(rng, 6).upper(), 'Раздел', str(section_id), (section_id - 2) // 8 + 1))
+    return {
+        'search': sections,
+        'namegroups': [(i, _text(rng, 8)) for i in range(rows)],
+        'works': [(i, f'01-01-{i:03d}', _text(rng, 5), '100 м3') for i in range(rows)],
+        'work': (
+            (1, '01-01-001-01', _text(rng, 5), '100 м3', '95', '50'),
+            [(i, _text(rng, 12)) for i in range(rows // 10)],
+            [(i, None, None, f'{rng.random():.2f}', 'т', f'01.1.{i}', _text(rng, 6), None, None, None, None)
+             for i in range(rows)],
+        ),
+    }
+
+
+def legacy_search(service, rows):
+    return service._build_hierarchy(rows)
+
+
+def legacy_namegroups(rows):
+    return [NameGroup(id=row[0], begin_name=row[1]) for row in rows]
+
+
+def legacy_works(rows):
+    return [Work(id=row[0], code=row[1], end_name=row[2], measure_unit=row[3]) for row in rows]
+
+
+def legacy_work(work_row, items_rows, resources_rows):
+    return WorkDetail(
+        id=work_row[0], code=work_row[1], end_name=work_row[2], measure_unit=work_row[3], nr=work_row[4],
+        sp=work_row[5],
+        items=[Item(id=row[0], text=row[1]) for row in items_rows],
+        resources=[WorkResourceData(**dict(zip(WorkResourceData.model_fields, row))) for row in resources_rows]
+    )
+
+
+async def _serialize(field, content):
+    # То, что FastAPI делает с результатом обработчика: проверка и кодирование по response_model
+    return await serialize_response(field=field, response_content=content)
+
+
+def benchmark(rows, repeat):
+    service = SectionService(None)
+    data = generate_rows(rows)
+    fields = {
+        'search': create_response_field(name='search', type_=List[Section]),
+        'namegroups': create_response_field(name='namegroups', type_=List[NameGroup]),
+        'works': create_response_field(name='works', type_=List[Work]),
+        'work': create_response_field(name='work', type_=WorkDetail),
+    }
+    paths = {
+        'search': (lambda: legacy_search(service, data['search']), lambda: service._build_hierarchy(data['search'])),
+        'namegroups': (lambda: legacy_namegroups(data['namegroups']),
+                       lambda: service._map_namegroups(data['namegroups'])),
+        'works': (lambda: legacy_works(data['works']), lambda: service._map_works(data['works'])),
+        'work': (lambda: legacy_work(*data['work']), lambda: service._map_work_detail(*data['work'])),
+    }
+
+    loop = asyncio.new_event_loop()
+    results = {}
+    for endpoint, (legacy, fast) in paths.items():
+        def before():
+            content = loop.run_until_complete(_serialize(fields[endpoint], legacy()))
+            return JSONResponse(content).body
+
+        def after():
+            return dumps(fast())
+
+        assert json.loads(before()) == json.loads(after()), endpoint
+        before_seconds = min(timeit.repeat(before, number=1, repeat=repeat))
+        after_seconds = min(timeit.repeat(after, number=1, repeat=repeat))
+        results[endpoint] = {
+            'rows': rows,
+            'bytes': len(after()),
+            'before_ms': before_seconds * 1000,
+            'after_ms': after_seconds * 1000,
+            'speedup': before_seconds / after_seconds if after_seconds else None,
+        }
+    loop.close()
+    return results
+
+
+def print_report(results):
+    print(f"{'endpoint':>12} {'rows':>7} {'KB':>8} {'before ms':>10} {'after ms':>9} {'speedup':>8}")
+    for endpoint, result in results.items():
+        print(f"{endpoint:>12} {result['rows']:>7} {result['bytes'] / 1024:>8.1f} {result['before_ms']:>10.2f} "
+              f"{result['after_ms']:>9.2f} {result['speedup'] or 0:>7.1f}x")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Стоимость сериализации ответов до и после быстрого пути')
+    parser.add_argument('--rows', type=int, default=2000, help='строк в ответе каждого эндпоинта')
+    parser.add_argument('--repeat', type=int, default=20, help='повторов; берется лучшее время')
+    parser.add_argument('--json', help='записать результаты в JSON-файл')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    results = benchmark(args.rows, args.repeat)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
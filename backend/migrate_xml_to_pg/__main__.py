@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import sys
+
+from .load_data import BATCH_SIZE, Base, engine
+from .metrics import configure_logging
+from .migrations import apply_migrations
+from .parallel import migrate_catalogs
+from .staging import refresh_catalogs
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'initial_normative_data')
+CATALOGS = ('ФЕР', 'ФЕРм', 'ФЕРмр', 'ФЕРп', 'ФЕРр', 'ФССЦ', 'ФССЦпг', 'ФСЭМ')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Импорт нормативных XML-каталогов в PostgreSQL')
+    parser.add_argument('files', nargs='*',
+                        default=[os.path.join(DATA_DIR, f'{catalog}.xml') for catalog in CATALOGS],
+                        help='XML-файлы каталогов (по умолчанию все каталоги из initial_normative_data)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='количество работ между фиксациями транзакции, 0 - одна транзакция на файл')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='количество процессов (по умолчанию по одному на каталог, не больше числа ядер)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--delta', action='store_true',
+                      help='инкрементальный импорт: записать только изменения относительно загруженной базы')
+    mode.add_argument('--staging', action='store_true',
+                      help='полная перезагрузка без простоя: загрузить в отдельную схему и атомарно подменить рабочую')
+    parser.add_argument('--report', metavar='FILE',
+                        help='записать JSON-сводку (скорость, время фаз, ошибки и предупреждения) в файл вместо stdout')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    configure_logging()
+
+    # Запуск миграции
+    if args.staging:
+        report = refresh_catalogs(args.files, args.batch_size or None, args.workers)
+    else:
+        # Создание таблиц и применение миграций схемы
+        Base.metadata.create_all(engine)
+        connection = engine.raw_connection()
+        try:
+            apply_migrations(connection)
+        finally:
+            connection.close()
+        report = migrate_catalogs(args.files, args.batch_size or None, args.workers, args.delta)
+
+    # Сводка по всем каталогам, включая ошибки, выводится одним JSON-документом после завершения миграции
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    # Неуспех - сбой импорта каталога. Предупреждения (повторы позиций и ресурсов в работе) есть
+    # в настоящих каталогах и неуспехом не считаются
+    if any(summary['error_count'] for summary in report['catalogs'].values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import io
+import time
+from collections import deque
+
+from .metrics import ImportMetrics
+
+# Таблицы в порядке сброса: родители раньше потомков, чтобы внешние ключи были уже на месте
+TABLE_COLUMNS = {
+    'base': ('id', 'price_level', 'creation_date', 'creation_time', 'program_name', 'base_name', 'base_type',
+             'decree'),
+    'import_run': ('id', 'file_name', 'base_id', 'completed_sections', 'status'),
+    'resource_category': ('id', 'type', 'code_prefix', 'base_id'),
+    'section': ('id', 'name', 'type', 'code', 'parent_section_id', 'base_id', 'resource_category_id'),
+    'section_closure': ('ancestor_id', 'descendant_id', 'depth'),
+    'name_group': ('id', 'begin_name', 'section_id'),
+    'item': ('id', 'text'),
+    'resource': ('id', 'code', 'end_name', 'measure_unit'),
+    'abstract_resource': ('id', 'code', 'name', 'measure_unit'),
+    'service_resource': ('id', 'code', 'category', 'name', 'measure_unit', 'type'),
+    'work': ('id', 'code', 'end_name', 'measure_unit', 'name_group_id', 'nr', 'sp'),
+    'work_item': ('work_id', 'item_id'),
+    'work_resource': ('id', 'work_id', 'resource_id', 'abstract_resource_id', 'service_resource_id', 'quantity',
+                      'quantity_value', 'measure_unit'),
+    'price': ('id', 'cost', 'salary_mach', 'salary', 'machines', 'materials', 'work_id'),
+    'correction': ('id', 'coeff', 'from_field', 'to_field', 'price_id'),
+    'resource_price': ('id', 'base_id', 'section_id', 'name_group_id', 'code', 'name', 'measure_unit', 'cost',
+                       'opt_cost', 'salary', 'salary_mach', 'machines', 'materials'),
+    'catalog_fingerprint': ('id', 'base_id', 'kind', 'key', 'fingerprint', 'row_id'),
+}
+
+
+class IdAllocator:
+    """Выдает первичные ключи на стороне клиента, резервируя диапазоны значений из последовательностей таблиц.
+
+    Размер резервируемого диапазона удваивается до block_size, чтобы редкие таблицы не расходовали лишние значения.
+    """
+
+    def __init__(self, connection, block_size=1000):
+        self.connection = connection
+        self.block_size = block_size
+        self._reserved = {}
+        self._next_block = {}
+
+    def next_id(self, table):
+        reserved = self._reserved.setdefault(table, deque())
+        if not reserved:
+            count = self._next_block.get(table, 1)
+            with self.connection.cursor() as cur:
+                cur.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                            (table, count))
+                reserved.extend(row[0] for row in cur.fetchall())
+            self._next_block[table] = min(count * 2, self.block_size)
+        return reserved.popleft()
+
+
+class BulkWriter:
+    """Буферизует строки по таблицам и записывает их через COPY FROM STDIN.
+
+    Первичные ключи выдаются заранее через IdAllocator, поэтому потомков можно ссылать на родителей
+    без промежуточных сбросов. Транзакция фиксируется только по явному вызову commit().
+    """
+
+    def __init__(self, connection, flush_rows=50000, metrics=None):
+        self.connection = connection
+        self.flush_rows = flush_rows
+        self.metrics = metrics if metrics is not None else ImportMetrics()
+        self.ids = IdAllocator(connection)
+        self._buffers = {table: [] for table in TABLE_COLUMNS}
+        self.buffered = 0
+
+    def add(self, table, **values):
+        """Добавляет строку в буфер таблицы. Если у таблицы есть id и он не передан, выдает новый."""
+        columns = TABLE_COLUMNS[table]
+        if columns[0] == 'id' and values.get('id') is None:
+            values['id'] = self.ids.next_id(table)
+        self._buffers[table].append(tuple(values.get(column) for column in columns))
+        self.buffered += 1
+        if self.buffered >= self.flush_rows:
+            self.flush()
+        return values.get('id')
+
+    def flush(self):
+        started = time.perf_counter()
+        self.metrics.set_queue_depth('buffered_rows', self.buffered)
+        with self.connection.cursor() as cur:
+            for table, rows in self._buffers.items():
+                if not rows:
+                    continue
+                columns = TABLE_COLUMNS[table]
+                cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", _to_copy_stream(rows))
+                self.metrics.add_rows(table, len(rows))
+                rows.clear()
+        self.buffered = 0
+        self.metrics.set_queue_depth('buffered_rows', 0)
+        self.metrics.add_time('write', time.perf_counter() - started)
+
+    def commit(self):
+        self.flush()
+        started = time.perf_counter()
+        self.connection.commit()
+        self.metrics.add_time('write', time.perf_counter() - started)
+
+    def rollback(self):
+        for rows in self._buffers.values():
+            rows.clear()
+        self.buffered = 0
+        self.connection.rollback()
+
+
+def _to_copy_stream(rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_value(value):
+    """Кодирует значение в текстовый формат COPY."""
+    if value is None:
+        return '\\N'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
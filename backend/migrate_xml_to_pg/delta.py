@@ -0,0 +1,121 @@
+from .load_data import CatalogImporter
+from .metrics import logger
+
+# Колонки узлов, которые обновляются при изменении отпечатка
+UPDATABLE_COLUMNS = {
+    'resource_category': ('type', 'code_prefix'),
+    'section': ('name', 'type', 'code'),
+    'name_group': ('begin_name',),
+    'work': ('code', 'end_name', 'measure_unit', 'nr', 'sp'),
+    'resource_price': ('code', 'name', 'measure_unit', 'cost', 'opt_cost', 'salary', 'salary_mach', 'machines',
+                       'materials'),
+}
+
+# Порядок удаления исчезнувших узлов: потомки раньше родителей
+DELETE_ORDER = ('resource_price', 'work', 'name_group', 'section', 'resource_category')
+
+
+def delete_work_content(cur, work_ids):
+    """Удаляет состав работ: позиции, ресурсы, цены и поправки."""
+    cur.execute("DELETE FROM correction WHERE price_id IN (SELECT id FROM price WHERE work_id = ANY(%s))",
+                (work_ids,))
+    cur.execute("DELETE FROM price WHERE work_id = ANY(%s)", (work_ids,))
+    cur.execute("DELETE FROM work_resource WHERE work_id = ANY(%s)", (work_ids,))
+    cur.execute("DELETE FROM work_item WHERE work_id = ANY(%s)", (work_ids,))
+
+
+class DeltaCatalogImporter(CatalogImporter):
+    """Повторный импорт новой редакции каталога поверх уже загруженной базы.
+
+    Узлы сопоставляются с прошлым импортом по ключу (путь из кодов), неизмененные по отпечатку
+    пропускаются, измененные обновляются на месте, новые добавляются, исчезнувшие удаляются.
+    Если база с таким BaseName еще не загружалась или загружена без отпечатков, выполняется обычный полный импорт.
+    Контрольные точки не нужны: повторный запуск после сбоя пропустит уже записанные изменения по отпечаткам.
+    """
+
+    resumable = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (таблица, ключ) -> (id отпечатка, id строки, отпечаток); после обхода остаются исчезнувшие узлы
+        self.known = {}
+        self.change_counts = {'unchanged': 0, 'updated': 0, 'inserted': 0, 'deleted': 0}
+
+    def on_base(self, element):
+        super().on_base(element)
+        with self.connection.cursor() as cur:
+            cur.execute("SELECT id FROM base WHERE base_name = %s AND base_type IS NOT DISTINCT FROM %s "
+                        "ORDER BY id DESC LIMIT 1", (self._base['base_name'], self._base['base_type']))
+            row = cur.fetchone()
+            if row is None:
+                return
+
+            cur.execute("SELECT id, kind, key, row_id, fingerprint FROM catalog_fingerprint WHERE base_id = %s",
+                        (row[0],))
+            known = {(kind, key): (fingerprint_id, row_id, fingerprint)
+                     for fingerprint_id, kind, key, row_id, fingerprint in cur}
+            if not known:
+                # База загружена до появления отпечатков: сопоставить узлы не с чем, и без этой проверки
+                # весь каталог добавился бы в нее второй раз. Выполняется полный импорт в новую базу
+                logger.warning("%s: base ID %s has no fingerprints, falling back to a full import into a new base",
+                               self._base['base_name'], row[0])
+                return
+
+            self.base_id = row[0]
+            self.known = known
+            # Документы пересобираются только для добавленных и измененных работ
+            self.changed_work_ids = []
+            values = {column: value for column, value in self._base.items() if column != 'decree'}
+            assignments = ', '.join(f"{column} = %s" for column in values)
+            cur.execute(f"UPDATE base SET {assignments} WHERE id = %s", (*values.values(), self.base_id))
+        logger.info("%s: delta import into base ID %s, %d fingerprints loaded",
+                    self._base['base_name'], self.base_id, len(self.known))
+
+    def store(self, table, key, fingerprint, values):
+        known = self.known.pop((table, key), None)
+        if known is None:
+            self.change_counts['inserted'] += 1
+            return super().store(table, key, fingerprint, values)
+
+        fingerprint_id, row_id, old_fingerprint = known
+        if old_fingerprint == fingerprint:
+            self.change_counts['unchanged'] += 1
+            return row_id, False
+
+        self.change_counts['updated'] += 1
+        columns = UPDATABLE_COLUMNS[table]
+        with self.connection.cursor() as cur:
+            assignments = ', '.join(f"{column} = %s" for column in columns)
+            cur.execute(f"UPDATE {table} SET {assignments} WHERE id = %s",
+                        (*(values[column] for column in columns), row_id))
+            cur.execute("UPDATE catalog_fingerprint SET fingerprint = %s WHERE id = %s",
+                        (fingerprint, fingerprint_id))
+            if table == 'work':
+                delete_work_content(cur, [row_id])
+        # Измененная работа записывается заново целиком, у остальных узлов потомки сверяются отдельно
+        return row_id, table == 'work'
+
+    def finish(self):
+        # Строки, буферизованные для новых узлов, должны оказаться в базе до удаления старых
+        self.writer.flush()
+        removed = {table: [] for table in DELETE_ORDER}
+        fingerprint_ids = []
+        for (table, key), (fingerprint_id, row_id, fingerprint) in self.known.items():
+            removed[table].append(row_id)
+            fingerprint_ids.append(fingerprint_id)
+
+        with self.connection.cursor() as cur:
+            if removed['work']:
+                delete_work_content(cur, removed['work'])
+            if removed['section']:
+                # Вместе с секцией исчезают и все ее потомки, поэтому достаточно удалить строки по потомку
+                cur.execute("DELETE FROM section_closure WHERE descendant_id = ANY(%s)", (removed['section'],))
+            for table in DELETE_ORDER:
+                if removed[table]:
+                    cur.execute(f"DELETE FROM {table} WHERE id = ANY(%s)", (removed[table],))
+            if fingerprint_ids:
+                cur.execute("DELETE FROM catalog_fingerprint WHERE id = ANY(%s)", (fingerprint_ids,))
+
+        self.change_counts['deleted'] = len(fingerprint_ids)
+        self.known = {}
+        self.metrics.details['delta'] = dict(self.change_counts)
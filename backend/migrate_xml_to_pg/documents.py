@@ -0,0 +1,63 @@
+# Готовый JSON ответа GET /work/{id} для работ базы: тот же состав и те же поля, что у WorkDetail в API.
+# Документ собирается в базе одним запросом по уже записанным строкам, поэтому совпадает с тем,
+# что API собрал бы из work, work_item и work_resource
+WORK_DOCUMENTS_SQL = """
+INSERT INTO work_document (work_id, document)
+SELECT w.id, json_build_object(
+    'id', w.id,
+    'code', w.code,
+    'end_name', w.end_name,
+    'measure_unit', w.measure_unit,
+    'nr', w.nr,
+    'sp', w.sp,
+    'items', COALESCE((
+        SELECT json_agg(json_build_object('id', i.id, 'text', i.text) ORDER BY i.id)
+        FROM work_item wi JOIN item i ON i.id = wi.item_id
+        WHERE wi.work_id = w.id
+    ), '[]'::json),
+    'resources', COALESCE((
+        SELECT json_agg(json_build_object(
+            'resource_id', wr.resource_id,
+            'abstract_resource_id', wr.abstract_resource_id,
+            'service_resource_id', wr.service_resource_id,
+            'quantity', wr.quantity,
+            'measure_unit', wr.measure_unit,
+            'resource_code', r.code,
+            'resource_end_name', r.end_name,
+            'abstract_resource_code', ar.code,
+            'abstract_resource_name', ar.name,
+            'service_resource_code', sr.code,
+            'service_resource_name', sr.name
+        ) ORDER BY wr.id)
+        FROM work_resource wr
+        LEFT JOIN resource r ON wr.resource_id = r.id
+        LEFT JOIN abstract_resource ar ON wr.abstract_resource_id = ar.id
+        LEFT JOIN service_resource sr ON wr.service_resource_id = sr.id
+        WHERE wr.work_id = w.id
+    ), '[]'::json)
+)
+FROM work w
+{condition}
+ON CONFLICT (work_id) DO UPDATE SET document = EXCLUDED.document
+"""
+
+
+BASE_WORKS_CONDITION = """JOIN name_group ng ON ng.id = w.name_group_id
+JOIN section s ON s.id = ng.section_id
+WHERE s.base_id = %s"""
+
+
+def refresh_work_documents(connection, base_id, work_ids=None):
+    """Пересобирает документы работ work_ids (None - всех работ базы) и возвращает их количество.
+
+    Документы удаленных работ удаляются каскадом вместе с работой.
+    """
+    if work_ids is None:
+        query, params = WORK_DOCUMENTS_SQL.format(condition=BASE_WORKS_CONDITION), (base_id,)
+    else:
+        query, params = WORK_DOCUMENTS_SQL.format(condition="WHERE w.id = ANY(%s)"), (list(work_ids),)
+    with connection.cursor() as cur:
+        cur.execute(query, params)
+        count = cur.rowcount
+    connection.commit()
+    return count
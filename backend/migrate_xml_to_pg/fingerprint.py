@@ -0,0 +1,23 @@
+import hashlib
+
+
+def fingerprint(element, deep=False):
+    """SHA-1 элемента XML: тег и атрибуты, а при deep=True и все поддерево в порядке документа.
+
+    Атрибуты сортируются, поэтому их порядок в файле на отпечаток не влияет.
+    """
+    digest = hashlib.sha1()
+    _update(digest, element, deep)
+    return digest.hexdigest()
+
+
+def _update(digest, element, deep):
+    digest.update(element.tag.encode('utf-8'))
+    for name, value in sorted(element.attrib.items()):
+        digest.update(f'\0{name}={value}'.encode('utf-8'))
+    if deep:
+        digest.update(b'(')
+        for child in element:
+            if isinstance(child.tag, str):
+                _update(digest, child, deep)
+        digest.update(b')')
@@ -0,0 +1,53 @@
+import hashlib
+
+# Справочники с естественным ключом: таблица -> ключевая колонка
+DICTIONARY_KEYS = {
+    'item': 'text',
+    'resource': 'code',
+    'abstract_resource': 'code',
+    'service_resource': 'code',
+}
+
+
+def text_hash(text):
+    """MD5 текста в виде байтов: совпадает с decode(md5(text), 'hex') на стороне PostgreSQL."""
+    if text is None:
+        return None
+    return hashlib.md5(text.encode('utf-8')).digest()
+
+
+class IdentityCache:
+    """Карты справочников на время импорта: код (для Item - хеш текста) -> id.
+
+    Заполняется из существующих таблиц один раз при старте, после чего поиск и дедупликация
+    записей справочников не обращаются к базе данных.
+    """
+
+    def __init__(self):
+        self.ids = {table: {} for table in DICTIONARY_KEYS}
+
+    @classmethod
+    def load(cls, connection):
+        cache = cls()
+        with connection.cursor() as cur:
+            for table, key_column in DICTIONARY_KEYS.items():
+                if table == 'item':
+                    cur.execute("SELECT id, decode(md5(text), 'hex') FROM item WHERE text IS NOT NULL")
+                    cache.ids[table].update((bytes(digest), item_id) for item_id, digest in cur)
+                else:
+                    cur.execute(f"SELECT id, {key_column} FROM {table}")
+                    cache.ids[table].update((key, row_id) for row_id, key in cur)
+        return cache
+
+    @staticmethod
+    def key(table, value):
+        return text_hash(value) if table == 'item' else value
+
+    def get(self, table, value):
+        return self.ids[table].get(self.key(table, value))
+
+    def add(self, table, value, row_id):
+        self.ids[table][self.key(table, value)] = row_id
+
+    def size(self):
+        return {table: len(ids) for table, ids in self.ids.items()}
@@ -0,0 +1,90 @@
+import logging
+import time
+
+logger = logging.getLogger('migrate_xml_to_pg')
+
+
+def configure_logging(level=logging.INFO):
+    """Прогресс импорта пишется в stderr, чтобы stdout оставался для машиночитаемой сводки."""
+    logging.basicConfig(level=level, format='%(asctime)s %(processName)s %(levelname)s %(message)s')
+
+
+class ImportMetrics:
+    """Счетчики импорта одного каталога: строки по таблицам, время фаз, глубина буфера, ошибки и предупреждения.
+
+    Предупреждения - некритичные особенности данных (например, повторы позиций в работе), которые есть
+    в настоящих каталогах; в отличие от ошибок, они не делают импорт неуспешным.
+
+    Раз в report_interval секунд пишет в лог строку с общей и потабличной скоростью с прошлого отчета,
+    а по окончании отдает сводку summary(), пригодную для json.dump.
+    """
+
+    def __init__(self, name=None, report_interval=10.0):
+        self.name = name
+        self.report_interval = report_interval
+        self.started = time.perf_counter()
+        self.rows = {}
+        self.phases = {}
+        self.queue_depths = {}
+        self.max_queue_depths = {}
+        self.errors = []
+        self.warnings = []
+        self.details = {}
+        self._last_report = self.started
+        self._last_rows = {}
+
+    def add_rows(self, table, count):
+        self.rows[table] = self.rows.get(table, 0) + count
+
+    def add_time(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def set_queue_depth(self, queue, depth):
+        self.queue_depths[queue] = depth
+        if depth > self.max_queue_depths.get(queue, 0):
+            self.max_queue_depths[queue] = depth
+
+    def error(self, message):
+        self.errors.append(message)
+        logger.debug("%s: %s", self.name, message)
+
+    def warning(self, message):
+        self.warnings.append(message)
+        logger.debug("%s: %s", self.name, message)
+
+    def maybe_report(self):
+        now = time.perf_counter()
+        if now - self._last_report >= self.report_interval:
+            self.report(now)
+
+    def report(self, now=None):
+        now = now or time.perf_counter()
+        interval = now - self._last_report
+        rates = {table: (count - self._last_rows.get(table, 0)) / interval
+                 for table, count in self.rows.items() if count != self._last_rows.get(table, 0)}
+        logger.info("%s: %d rows in %.0fs, %.0f rows/s now (%s), queues %s, %d errors, %d warnings",
+                    self.name, sum(self.rows.values()), now - self.started, sum(rates.values()),
+                    ', '.join(f"{table} {rate:.0f}/s" for table, rate in rates.items()),
+                    self.queue_depths, len(self.errors), len(self.warnings))
+        self._last_report = now
+        self._last_rows = dict(self.rows)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        total_rows = sum(self.rows.values())
+        phases = dict(self.phases)
+        phases['other'] = max(elapsed - sum(self.phases.values()), 0.0)
+        return {
+            'name': self.name,
+            'elapsed_seconds': elapsed,
+            'rows': dict(self.rows),
+            'total_rows': total_rows,
+            'rows_per_second': total_rows / elapsed if elapsed else None,
+            'phase_seconds': phases,
+            'max_queue_depths': dict(self.max_queue_depths),
+            'details': dict(self.details),
+            'error_count': len(self.errors),
+            'errors': list(self.errors),
+            'warning_count': len(self.warnings),
+            'warnings': list(self.warnings),
+        }
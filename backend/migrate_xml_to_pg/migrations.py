@@ -0,0 +1,43 @@
+import os
+
+from .metrics import logger
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'queries', 'migrations')
+
+
+def pending_migrations(applied):
+    """Файлы миграций, которые еще не применялись, в порядке номеров версий."""
+    names = sorted(name for name in os.listdir(MIGRATIONS_DIR) if name.endswith('.sql'))
+    return [name for name in names if name[:-len('.sql')] not in applied]
+
+
+def apply_migrations(connection):
+    """Применяет новые миграции из queries/migrations, каждую в своей транзакции.
+
+    Примененные версии записываются в schema_migrations той схемы, куда направлено соединение,
+    поэтому свежая схема для перезагрузки каталога получает все миграции заново.
+    """
+    with connection.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations
+            (
+                version    TEXT PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        cur.execute("SELECT version FROM schema_migrations")
+        applied = {version for version, in cur.fetchall()}
+    connection.commit()
+
+    applied_now = []
+    for name in pending_migrations(applied):
+        with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+            sql = f.read()
+        version = name[:-len('.sql')]
+        with connection.cursor() as cur:
+            cur.execute(sql)
+            cur.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+        connection.commit()
+        applied_now.append(version)
+        logger.info("Migration applied: %s", version)
+    return applied_now
@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .bulk import BulkWriter
+from .delta import DeltaCatalogImporter
+from .identity_cache import IdentityCache
+from . import load_data
+from .load_data import BATCH_SIZE, CatalogImporter, iter_dictionary_entries, migrate_data
+from .metrics import ImportMetrics, configure_logging, logger
+from .streaming import iter_catalog
+
+
+def collect_dictionaries(xml_file):
+    """Собирает записи справочников каталога без записи в базу: таблица -> ключ -> значения колонок."""
+    entries = {}
+    for tag, element in iter_catalog(xml_file):
+        if tag == 'Work':
+            for table, key, values in iter_dictionary_entries(element):
+                entries.setdefault(table, {}).setdefault(key, values)
+    return entries
+
+
+def merge_dictionaries(collected):
+    """Записывает недостающие записи справочников одним шагом, по одной строке на код для всех каталогов."""
+    connection = load_data.engine.raw_connection()
+    try:
+        cache = IdentityCache.load(connection)
+        writer = BulkWriter(connection, metrics=ImportMetrics('dictionaries'))
+        for entries in collected:
+            for table, values_by_key in entries.items():
+                for key, values in values_by_key.items():
+                    if cache.get(table, key) is None:
+                        cache.add(table, key, writer.add(table, **values))
+        writer.commit()
+        return writer.metrics.summary()
+    finally:
+        connection.close()
+
+
+def import_catalog(xml_file, batch_size, delta=False):
+    """Импортирует один каталог в процессе пула и возвращает сводку ImportMetrics с ошибками этого каталога."""
+    importer_class = DeltaCatalogImporter if delta else CatalogImporter
+    return migrate_data(xml_file, batch_size, importer_class=importer_class)
+
+
+def catalog_summary(future, xml_file):
+    """Сводка импорта каталога из процесса пула; при исключении - сводка с ошибкой вместо него."""
+    try:
+        return future.result()
+    except Exception as e:
+        # Транзакции каталога откатываются в процессе пула, записанные сборники продолжит следующий запуск
+        logger.error("%s: import failed", os.path.basename(xml_file), exc_info=e)
+        metrics = ImportMetrics(os.path.basename(xml_file))
+        metrics.error(f"Import failed: {e!r}")
+        return metrics.summary()
+
+
+def _init_worker(schema, log_level):
+    # Соединения, унаследованные от родительского процесса, в дочернем использовать нельзя
+    load_data.engine.dispose(close=False)
+    load_data.use_schema(schema)
+    configure_logging(log_level)
+
+
+def migrate_catalogs(xml_files, batch_size=BATCH_SIZE, workers=None, delta=False):
+    """Импортирует каталоги параллельно, по процессу на каталог.
+
+    Сначала процессы собирают справочники (Item, Resource, AbstractResource, ServiceResource) своих каталогов,
+    затем они сводятся и записываются в базу в одном процессе. После этого каталоги импортируются параллельно,
+    и каждый процесс находит все справочники уже записанными.
+    При delta=True каталоги сверяются с ранее загруженными базами и записываются только изменения.
+
+    Возвращает сводку: время фаз, сводки ImportMetrics по справочникам и по каждому каталогу.
+    Сбой импорта одного каталога не прерывает остальные: он попадает в errors сводки этого каталога.
+    """
+    workers = workers or min(len(xml_files), os.cpu_count() or 1)
+    report = {'phase_seconds': {}, 'catalogs': {}}
+    started = time.perf_counter()
+    initargs = (load_data.schema, logger.getEffectiveLevel())
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        collected = list(pool.map(collect_dictionaries, xml_files))
+        report['phase_seconds']['collect_dictionaries'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        report['dictionaries'] = merge_dictionaries(collected)
+        del collected
+        report['phase_seconds']['merge_dictionaries'] = time.perf_counter() - started
+        logger.info("Dictionaries merged: %s", report['dictionaries']['rows'])
+
+        started = time.perf_counter()
+        futures = {pool.submit(import_catalog, xml_file, batch_size, delta): xml_file for xml_file in xml_files}
+        for done, future in enumerate(as_completed(futures), start=1):
+            summary = catalog_summary(future, futures[future])
+            report['catalogs'][futures[future]] = summary
+            logger.info("%s imported: %d rows, %.0f rows/s, %d errors, %d warnings; catalogs queued or running: %d",
+                        summary['name'], summary['total_rows'], summary['rows_per_second'] or 0,
+                        summary['error_count'], summary['warning_count'], len(futures) - done)
+        report['phase_seconds']['import'] = time.perf_counter() - started
+    return report
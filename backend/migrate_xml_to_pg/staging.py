@@ -0,0 +1,112 @@
+import os
+import time
+
+from . import load_data
+from .load_data import BATCH_SIZE, Base
+from .metrics import logger
+from .migrations import apply_migrations
+from .parallel import migrate_catalogs
+
+LIVE_SCHEMA = 'public'
+STAGING_SCHEMA = 'catalog_staging'
+# Предыдущая версия каталога остается после переключения, чтобы к ней можно было вернуться
+PREVIOUS_SCHEMA = 'catalog_previous'
+
+
+def _execute(statements):
+    connection = load_data.engine.raw_connection()
+    try:
+        with connection.cursor() as cur:
+            for statement in statements:
+                cur.execute(statement)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def staging_runs():
+    """Статусы импорта файлов в схеме загрузки, оставшейся от прошлого запуска: имя файла -> статус."""
+    connection = load_data.engine.raw_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s)", (f"{STAGING_SCHEMA}.import_run",))
+            if cur.fetchone()[0] is None:
+                return {}
+            cur.execute(f"SELECT DISTINCT ON (file_name) file_name, status FROM {STAGING_SCHEMA}.import_run "
+                        "ORDER BY file_name, id DESC")
+            return dict(cur.fetchall())
+    finally:
+        connection.close()
+
+
+def prepare_staging(xml_files):
+    """Готовит схему для новой версии каталога и направляет в нее загрузчик. Возвращает файлы для загрузки.
+
+    Если в схеме остался прерванный импорт одного из файлов, схема сохраняется вместе с контрольными точками:
+    прерванные файлы продолжаются с последнего сборника, а уже загруженные пропускаются.
+    Иначе схема пересоздается пустой.
+    """
+    load_data.use_schema(LIVE_SCHEMA)
+    runs = staging_runs()
+    if any(runs.get(os.path.basename(xml_file)) == 'running' for xml_file in xml_files):
+        done = [xml_file for xml_file in xml_files if runs.get(os.path.basename(xml_file)) == 'done']
+        logger.info("Resuming interrupted staging import, already loaded: %s",
+                    ', '.join(map(os.path.basename, done)) or 'none')
+        xml_files = [xml_file for xml_file in xml_files if xml_file not in done]
+    else:
+        _execute((f"DROP SCHEMA IF EXISTS {STAGING_SCHEMA} CASCADE", f"CREATE SCHEMA {STAGING_SCHEMA}"))
+    load_data.use_schema(STAGING_SCHEMA)
+    Base.metadata.create_all(load_data.engine)
+    return xml_files
+
+
+def finalize_staging():
+    """Применяет миграции (индексы, функции) к загруженной схеме и собирает статистику планировщика.
+
+    Индексы дешевле построить один раз после загрузки, чем поддерживать при каждой вставке.
+    """
+    connection = load_data.engine.raw_connection()
+    try:
+        apply_migrations(connection)
+        # ANALYZE нельзя выполнить внутри транзакции вместе с остальными командами
+        connection.autocommit = True
+        with connection.cursor() as cur:
+            cur.execute("ANALYZE")
+        connection.autocommit = False
+    finally:
+        connection.close()
+
+
+def swap_staging():
+    """Атомарно подменяет рабочую схему загруженной: API видит либо старый каталог, либо новый целиком."""
+    load_data.use_schema(LIVE_SCHEMA)
+    _execute((
+        f"DROP SCHEMA IF EXISTS {PREVIOUS_SCHEMA} CASCADE",
+        f"ALTER SCHEMA {LIVE_SCHEMA} RENAME TO {PREVIOUS_SCHEMA}",
+        f"ALTER SCHEMA {STAGING_SCHEMA} RENAME TO {LIVE_SCHEMA}",
+    ))
+
+
+def refresh_catalogs(xml_files, batch_size=BATCH_SIZE, workers=None):
+    """Полностью перезагружает каталоги без простоя API.
+
+    Загрузка идет в отдельную схему, пока API продолжает читать старые данные. Затем в ней строятся
+    индексы и собирается статистика, и схемы меняются местами в одной транзакции.
+    Повторный запуск после сбоя продолжает загрузку в ту же схему (см. prepare_staging).
+    """
+    xml_files = prepare_staging(xml_files)
+    report = migrate_catalogs(xml_files, batch_size, workers)
+    failed = [name for name, summary in report['catalogs'].items() if summary['error_count']]
+    if failed:
+        # Рабочая схема остается прежней, а загрузка в схему загрузки продолжится при следующем запуске
+        logger.error("Staging import failed for %s, live schema is not swapped", ', '.join(failed))
+        return report
+
+    started = time.perf_counter()
+    finalize_staging()
+    report['phase_seconds']['finalize_staging'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    swap_staging()
+    report['phase_seconds']['swap'] = time.perf_counter() - started
+    return report
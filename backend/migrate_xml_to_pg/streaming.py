@@ -0,0 +1,64 @@
+from lxml import etree
+
+# Теги, которые образуют иерархию каталога
+HIERARCHY_TAGS = ('ResourceCategory', 'Section', 'NameGroup', 'Work')
+# Родители позиций справочников цен (ФССЦ, ФССЦпг, ФСЭМ): ресурсы лежат прямо в секциях и группах, а не в работах
+PRICED_RESOURCE_PARENTS = ('Section', 'NameGroup')
+
+
+def iter_catalog(xml_file):
+    """Потоково обходит XML-каталог и выдает события (тег, элемент).
+
+    Base, ResourceCategory, Section и NameGroup выдаются по открывающему тегу: атрибуты уже прочитаны,
+    а идентификатор записи нужен потомкам. Work выдается по закрывающему тегу вместе со всем поддеревом.
+    Для каждого закрытого Section/NameGroup/Work выдается событие с префиксом '/' ('/Section' и т.д.).
+    Элемент с атрибутом Code прямо внутри Section или NameGroup (позиция справочника цен) выдается
+    по закрывающему тегу как 'PricedResource'.
+    После обработки события поддерево освобождается, поэтому потребитель должен закончить работу
+    с элементом до запроса следующего события.
+    """
+    context = etree.iterparse(xml_file, events=('start', 'end'), huge_tree=True)
+    root = None
+    decree_found = False
+    work_depth = 0
+
+    for event, element in context:
+        tag = element.tag
+
+        if root is None:
+            root = element
+            yield 'Base', element
+            continue
+
+        if event == 'start':
+            if tag == 'Work':
+                work_depth += 1
+            elif work_depth == 0 and tag in HIERARCHY_TAGS:
+                yield tag, element
+            continue
+
+        if tag == 'Decree' and not decree_found:
+            decree_found = True
+            yield 'Decree', element
+        elif tag == 'Work':
+            work_depth -= 1
+            if work_depth == 0:
+                yield 'Work', element
+                _release(element)
+        elif work_depth == 0 and tag in HIERARCHY_TAGS:
+            yield '/' + tag, element
+            _release(element)
+        elif work_depth == 0 and 'Code' in element.attrib and element.getparent().tag in PRICED_RESOURCE_PARENTS:
+            yield 'PricedResource', element
+            _release(element)
+
+    del context
+
+
+def _release(element):
+    """Очищает обработанный элемент и уже пройденных соседей, чтобы дерево не росло."""
+    element.clear(keep_tail=True)
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
@@ -1,3 +1,6 @@
+-- Справочная схема каталога: совпадает с моделями migrate_xml_to_pg/load_data.py после миграций
+-- queries/migrations/0001-0007. Загрузчик создает таблицы по моделям и применяет миграции сам.
+
 -- Создание таблицы base с новым полем decree
 CREATE TABLE base
 (
@@ -8,7 +11,9 @@ CREATE TABLE base
     program_name  VARCHAR(50),
     base_name     VARCHAR(100),
     base_type     VARCHAR(50),
-    decree        TEXT -- Новое поле decree
+    decree        TEXT, -- Новое поле decree
+    -- Метка последнего импорта базы (микросекунды с начала эпохи): по ней API сбрасывает кеш
+    version       BIGINT NOT NULL DEFAULT 0
 );
 
 -- Удаление таблиц decree и decrees
@@ -23,17 +28,32 @@ CREATE TABLE resource_category
     base_id     INTEGER REFERENCES base (id)
 );
 
--- Создание таблицы section с заменой resource_category_id на base_id
+-- Создание таблицы section
 CREATE TABLE section
 (
-    id                SERIAL PRIMARY KEY,
-    name              TEXT,
-    type              VARCHAR(30),
-    code              VARCHAR(30),
-    parent_section_id INTEGER REFERENCES section (id),
-    base_id           INTEGER REFERENCES base (id)
+    id                   SERIAL PRIMARY KEY,
+    name                 TEXT,
+    type                 VARCHAR(30),
+    code                 VARCHAR(30),
+    parent_section_id    INTEGER REFERENCES section (id),
+    base_id              INTEGER REFERENCES base (id),
+    resource_category_id INTEGER REFERENCES resource_category (id)
+);
+
+-- Дочерние и корневые секции по порядку id
+CREATE INDEX section_parent_section_id_idx ON section (parent_section_id, id) INCLUDE (name, type, code);
+
+-- Замыкание иерархии секций: каждая пара (предок, потомок) с расстоянием между ними, включая (s, s, 0)
+CREATE TABLE section_closure
+(
+    ancestor_id   INTEGER REFERENCES section (id),
+    descendant_id INTEGER REFERENCES section (id),
+    depth         INTEGER,
+    PRIMARY KEY (ancestor_id, descendant_id)
 );
 
+CREATE INDEX section_closure_descendant_id_idx ON section_closure (descendant_id, depth) INCLUDE (ancestor_id);
+
 -- Создание таблицы name_group
 CREATE TABLE name_group
 (
@@ -42,6 +62,8 @@ CREATE TABLE name_group
     section_id INTEGER REFERENCES section (id)
 );
 
+CREATE INDEX name_group_section_id_idx ON name_group (section_id, id) INCLUDE (begin_name);
+
 -- Создание таблицы work с добавлением полей nr и sp и удалением parent_work_id
 CREATE TABLE work
 (
@@ -54,19 +76,24 @@ CREATE TABLE work
     sp            VARCHAR(50)  -- Новое поле sp
 );
 
+CREATE INDEX work_name_group_id_idx ON work (name_group_id, id) INCLUDE (code, end_name, measure_unit);
+
 -- Создание таблицы item для хранения уникальных действий
 CREATE TABLE item
 (
     id   SERIAL PRIMARY KEY,
-    text TEXT UNIQUE
+    text TEXT
 );
 
+-- Уникальность текста проверяется по хешу: btree по длинному тексту медленный и ограничен размером строки
+CREATE UNIQUE INDEX item_text_md5_key ON item (md5(text));
+
 -- Создание таблицы work_item для связывания work и item
 CREATE TABLE work_item
 (
-    id      SERIAL PRIMARY KEY,
     work_id INTEGER REFERENCES work (id),
-    item_id INTEGER REFERENCES item (id)
+    item_id INTEGER REFERENCES item (id),
+    PRIMARY KEY (work_id, item_id)
 );
 
 -- Создание таблицы resource
@@ -108,9 +135,14 @@ CREATE TABLE work_resource
     abstract_resource_id INTEGER REFERENCES abstract_resource (id),
     service_resource_id  INTEGER REFERENCES service_resource (id),
     quantity             VARCHAR(30),
+    -- Количество числом; NULL, если в каталоге не число (например, "П" - по проекту)
+    quantity_value       NUMERIC,
     measure_unit         VARCHAR(100)
 );
 
+CREATE INDEX work_resource_work_id_idx ON work_resource (work_id)
+    INCLUDE (resource_id, abstract_resource_id, service_resource_id, quantity, measure_unit);
+
 -- Создание таблицы price с заменой prices_id на work_id
 CREATE TABLE price
 (
@@ -123,6 +155,8 @@ CREATE TABLE price
     work_id     INTEGER REFERENCES work (id)
 );
 
+CREATE INDEX price_work_id_idx ON price (work_id);
+
 -- Создание таблицы correction
 CREATE TABLE correction
 (
@@ -132,3 +166,71 @@ CREATE TABLE correction
     to_field   VARCHAR(30),
     price_id   INTEGER REFERENCES price (id)
 );
+
+CREATE INDEX correction_price_id_idx ON correction (price_id);
+
+-- Позиция справочника цен (ФССЦ, ФССЦпг, ФСЭМ) с ценами в числовых колонках
+CREATE TABLE resource_price
+(
+    id            SERIAL PRIMARY KEY,
+    base_id       INTEGER REFERENCES base (id),
+    section_id    INTEGER REFERENCES section (id),
+    name_group_id INTEGER REFERENCES name_group (id),
+    code          VARCHAR(50),
+    name          TEXT,
+    measure_unit  VARCHAR(100),
+    cost          NUMERIC,
+    opt_cost      NUMERIC,
+    salary        NUMERIC,
+    salary_mach   NUMERIC,
+    machines      NUMERIC,
+    materials     NUMERIC
+);
+
+CREATE INDEX resource_price_code_idx ON resource_price (code) INCLUDE (base_id, cost, opt_cost);
+
+-- Цены работ с примененными поправками, материализованные для всей базы
+CREATE TABLE corrected_price
+(
+    price_id    INTEGER PRIMARY KEY REFERENCES price (id) ON DELETE CASCADE,
+    base_id     INTEGER NOT NULL REFERENCES base (id),
+    work_id     INTEGER NOT NULL,
+    cost        NUMERIC,
+    salary      NUMERIC,
+    salary_mach NUMERIC,
+    machines    NUMERIC,
+    materials   NUMERIC
+);
+
+CREATE INDEX corrected_price_base_id_idx ON corrected_price (base_id);
+CREATE INDEX corrected_price_work_id_idx ON corrected_price (work_id);
+
+-- Ход импорта файла: количество полностью записанных сборников (секций верхнего уровня)
+CREATE TABLE import_run
+(
+    id                 SERIAL PRIMARY KEY,
+    file_name          VARCHAR,
+    base_id            INTEGER REFERENCES base (id),
+    completed_sections INTEGER,
+    status             VARCHAR
+);
+
+-- Отпечаток узла каталога для инкрементального импорта
+CREATE TABLE catalog_fingerprint
+(
+    id          SERIAL PRIMARY KEY,
+    base_id     INTEGER REFERENCES base (id),
+    kind        VARCHAR,
+    key         TEXT,
+    fingerprint VARCHAR(40),
+    row_id      INTEGER
+);
+
+CREATE INDEX ix_catalog_fingerprint_base_id ON catalog_fingerprint (base_id);
+
+-- Готовый JSON ответа GET /work/{id}
+CREATE TABLE work_document
+(
+    work_id  INTEGER PRIMARY KEY REFERENCES work (id) ON DELETE CASCADE,
+    document JSON
+);
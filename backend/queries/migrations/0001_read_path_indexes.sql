@@ -0,0 +1,26 @@
+-- Индексы под запросы SectionDAL: условие фильтра, затем id для ORDER BY,
+-- остальные выбираемые колонки в INCLUDE, чтобы запрос обходился index-only scan
+
+-- fetch_children и fetch_root_sections (parent_section_id IS NULL тоже ищется по этому индексу)
+CREATE INDEX IF NOT EXISTS section_parent_section_id_idx
+    ON section (parent_section_id, id) INCLUDE (name, type, code);
+
+-- fetch_namegroups
+CREATE INDEX IF NOT EXISTS name_group_section_id_idx
+    ON name_group (section_id, id) INCLUDE (begin_name);
+
+-- fetch_works
+CREATE INDEX IF NOT EXISTS work_name_group_id_idx
+    ON work (name_group_id, id) INCLUDE (code, end_name, measure_unit);
+
+-- fetch_work_data: позиции работы ищутся по первичному ключу work_item (work_id, item_id),
+-- отдельный индекс не нужен
+
+-- fetch_work_data: ресурсы работы
+CREATE INDEX IF NOT EXISTS work_resource_work_id_idx
+    ON work_resource (work_id)
+    INCLUDE (resource_id, abstract_resource_id, service_resource_id, quantity, measure_unit);
+
+-- Цены и поправки работы: удаление состава работы при инкрементальном импорте
+CREATE INDEX IF NOT EXISTS price_work_id_idx ON price (work_id);
+CREATE INDEX IF NOT EXISTS correction_price_id_idx ON correction (price_id);
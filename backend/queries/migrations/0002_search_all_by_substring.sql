@@ -1,4 +1,4 @@
-create function search_all_by_substring(query text)
+create or replace function search_all_by_substring(query text)
     returns TABLE
             (
                 id                integer,
@@ -66,5 +66,3 @@ BEGIN
         ORDER BY id;
 END;
 $$;
-
-alter function search_all_by_substring(text) owner to root;
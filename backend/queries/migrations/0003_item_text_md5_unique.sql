@@ -0,0 +1,4 @@
+-- Уникальность текста позиции проверяется по хешу: btree по длинному тексту медленный
+-- и не принимает строки больше трети страницы
+ALTER TABLE item DROP CONSTRAINT IF EXISTS item_text_key;
+CREATE UNIQUE INDEX IF NOT EXISTS item_text_md5_key ON item (md5(text));
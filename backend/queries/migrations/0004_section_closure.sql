@@ -0,0 +1,81 @@
+-- Замыкание иерархии секций заполняется загрузчиком; для баз, загруженных до его появления,
+-- строится здесь один раз рекурсивным запросом
+INSERT INTO section_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE closure AS (
+    SELECT id AS ancestor_id, id AS descendant_id, 0 AS depth
+    FROM section
+
+    UNION ALL
+
+    SELECT c.ancestor_id, s.id, c.depth + 1
+    FROM closure c
+             JOIN section s ON s.parent_section_id = c.descendant_id)
+SELECT ancestor_id, descendant_id, depth
+FROM closure
+WHERE NOT EXISTS (SELECT 1 FROM section_closure);
+
+-- Предки секции (хлебные крошки, дерево результатов поиска)
+CREATE INDEX IF NOT EXISTS section_closure_descendant_id_idx
+    ON section_closure (descendant_id, depth) INCLUDE (ancestor_id);
+
+-- Поиск больше не обходит иерархию рекурсивно: предки найденных секций берутся из замыкания
+create or replace function search_all_by_substring(query text)
+    returns TABLE
+            (
+                id                integer,
+                name              text,
+                type              text,
+                code              text,
+                parent_section_id integer
+            )
+    language plpgsql
+as
+$$
+/* Выполняет поиск в таблице section и связанных с ней таблицах (name_group, work, item), и возвращает иерархию найденных секций. Поиск осуществляется по переданному текстовому запросу query.
+Предки найденных секций берутся из таблицы section_closure.
+
+Параметры:
+- query (TEXT): текстовый запрос для поиска.
+
+Результат:
+- Таблица с колонками: id, name, type, code, parent_section_id.
+ */
+BEGIN
+    RETURN QUERY
+        WITH matched AS (
+            -- Основной поиск в таблице section
+            SELECT s.id AS section_id
+            FROM section s
+            WHERE s.name ILIKE '%' || query || '%'
+
+            UNION
+
+            -- Поиск в таблице name_group
+            SELECT ng.section_id
+            FROM name_group ng
+            WHERE ng.begin_name ILIKE '%' || query || '%'
+
+            UNION
+
+            -- Поиск в таблице work
+            SELECT ng.section_id
+            FROM name_group ng
+                     JOIN work w ON w.name_group_id = ng.id
+            WHERE w.end_name ILIKE '%' || query || '%'
+
+            UNION
+
+            -- Поиск в таблице item
+            SELECT ng.section_id
+            FROM name_group ng
+                     JOIN work w ON w.name_group_id = ng.id
+                     JOIN work_item wi ON wi.work_id = w.id
+                     JOIN item i ON i.id = wi.item_id
+            WHERE i.text ILIKE '%' || query || '%')
+        SELECT DISTINCT s.id, s.name::TEXT, s.type::TEXT, s.code::TEXT, s.parent_section_id
+        FROM matched m
+                 JOIN section_closure c ON c.descendant_id = m.section_id
+                 JOIN section s ON s.id = c.ancestor_id
+        ORDER BY s.id;
+END;
+$$;
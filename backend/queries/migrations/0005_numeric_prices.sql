@@ -0,0 +1,13 @@
+-- Количество ресурса числом рядом с исходной строкой: арифметика без приведения типов в каждой строке
+ALTER TABLE work_resource ADD COLUMN IF NOT EXISTS quantity_value NUMERIC;
+
+-- Та же нормализация, что в load_data.to_numeric: без пробелов и неразрывных пробелов между разрядами,
+-- десятичная запятая заменяется точкой
+UPDATE work_resource
+SET quantity_value = replace(translate(quantity, E' \u00A0', ''), ',', '.')::NUMERIC
+WHERE quantity_value IS NULL
+  AND replace(translate(quantity, E' \u00A0', ''), ',', '.') ~ '^\s*[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?\s*$';
+
+-- Цены справочников ФССЦ, ФССЦпг, ФСЭМ ищутся по коду ресурса
+CREATE INDEX IF NOT EXISTS resource_price_code_idx
+    ON resource_price (code) INCLUDE (base_id, cost, opt_cost);
@@ -0,0 +1,15 @@
+-- Цены работ с примененными поправками, материализованные для всей базы (POST /base/{base_id}/corrected-prices).
+-- Строки удаляются вместе с исходной ценой, поэтому инкрементальный импорт не оставляет устаревших цен
+CREATE TABLE IF NOT EXISTS corrected_price (
+    price_id    INTEGER PRIMARY KEY REFERENCES price (id) ON DELETE CASCADE,
+    base_id     INTEGER NOT NULL REFERENCES base (id),
+    work_id     INTEGER NOT NULL,
+    cost        NUMERIC,
+    salary      NUMERIC,
+    salary_mach NUMERIC,
+    machines    NUMERIC,
+    materials   NUMERIC
+);
+
+CREATE INDEX IF NOT EXISTS corrected_price_base_id_idx ON corrected_price (base_id);
+CREATE INDEX IF NOT EXISTS corrected_price_work_id_idx ON corrected_price (work_id);
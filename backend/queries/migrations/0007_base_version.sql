@@ -0,0 +1,3 @@
+-- Метка версии каталога: загрузчик обновляет ее после каждого импорта базы,
+-- а кеш API сравнивает max(version) и количество баз, чтобы сбросить записи прошлой версии
+ALTER TABLE base ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
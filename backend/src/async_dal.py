@@ -0,0 +1,72 @@
+from fastapi import HTTPException
+
+from . import queries
+from .database import AsyncDatabase
+from .queries import to_numbered_params
+
+
+class AsyncSectionDAL:
+    """Асинхронный вариант SectionDAL на asyncpg с теми же запросами и строками результата."""
+
+    def __init__(self, db: AsyncDatabase):
+        self.db = db
+
+    async def fetch_catalog_version(self):
+        return await self.db.pool.fetchval(queries.CATALOG_VERSION)
+
+    async def fetch_sections(self, substring: str):
+        return await self._execute_query(queries.SECTIONS_BY_SUBSTRING, substring)
+
+    async def fetch_children(self, parent_id: int, after_id: int = 0, limit: int = None):
+        return await self._execute_query(queries.CHILDREN, parent_id, after_id, limit)
+
+    async def fetch_root_sections(self):
+        return await self._execute_query(queries.ROOT_SECTIONS)
+
+    async def fetch_all_sections(self):
+        return await self._execute_query(queries.ALL_SECTIONS)
+
+    async def fetch_search_texts(self):
+        async with self.db.pool.acquire() as conn:
+            namegroup_rows = await conn.fetch(queries.SEARCH_NAMEGROUP_TEXTS)
+            work_rows = await conn.fetch(queries.SEARCH_WORK_TEXTS)
+        return namegroup_rows, work_rows
+
+    async def fetch_code_entries(self):
+        return await self._execute_query(queries.CODE_ENTRIES)
+
+    async def fetch_namegroups(self, section_id: int, after_id: int = 0, limit: int = None):
+        return await self._execute_query(queries.NAMEGROUPS, section_id, after_id, limit)
+
+    async def fetch_works(self, namegroup_id: int, after_id: int = 0, limit: int = None):
+        return await self._execute_query(queries.WORKS, namegroup_id, after_id, limit)
+
+    async def fetch_work_data(self, work_id: int):
+        async with self.db.pool.acquire() as conn:
+            work_row = await conn.fetchrow(to_numbered_params(queries.WORK), work_id)
+            if not work_row:
+                raise HTTPException(status_code=404, detail="Work not found")
+
+            items_rows = await conn.fetch(to_numbered_params(queries.WORK_ITEMS), work_id)
+            resources_rows = await conn.fetch(to_numbered_params(queries.WORK_RESOURCES), work_id)
+
+        return work_row, items_rows, resources_rows
+
+    async def fetch_work_document(self, work_id: int):
+        return await self.db.pool.fetchval(to_numbered_params(queries.WORK_DOCUMENT), work_id)
+
+    async def fetch_works_data(self, work_ids: list):
+        async with self.db.pool.acquire() as conn:
+            work_rows = await conn.fetch(to_numbered_params(queries.WORKS_BY_IDS), work_ids)
+            items_rows = await conn.fetch(to_numbered_params(queries.WORK_ITEMS_BY_WORKS), work_ids)
+            resources_rows = await conn.fetch(to_numbered_params(queries.WORK_RESOURCES_BY_WORKS), work_ids)
+        return work_rows, items_rows, resources_rows
+
+    async def fetch_namegroups_with_works(self, section_ids: list):
+        async with self.db.pool.acquire() as conn:
+            namegroup_rows = await conn.fetch(to_numbered_params(queries.NAMEGROUPS_BY_SECTIONS), section_ids)
+            work_rows = await conn.fetch(to_numbered_params(queries.WORKS_BY_SECTIONS), section_ids)
+        return namegroup_rows, work_rows
+
+    async def _execute_query(self, query: str, *params):
+        return await self.db.pool.fetch(to_numbered_params(query), *params)
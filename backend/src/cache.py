@@ -0,0 +1,111 @@
+import os
+import time
+from collections import OrderedDict
+
+from .serialization import dumps
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+
+class LRUCache:
+    """Кеш в памяти процесса, ограниченный числом записей и суммарным размером значений в байтах."""
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None):
+        self.max_entries = max_entries or int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+        self.max_bytes = max_bytes or int(os.getenv("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        self.entries = OrderedDict()
+        self.size = 0
+
+    async def get(self, key: str):
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self.entries[key] = value
+        self.size += len(value)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class RedisCache:
+    """Общий кеш для нескольких процессов uvicorn. Записи живут ttl секунд, вытеснение настраивается в Redis."""
+
+    def __init__(self, url: str, ttl: int = None):
+        if redis is None:
+            raise RuntimeError("CACHE_URL is set, but the redis package is not installed")
+        self.client = redis.from_url(url)
+        self.ttl = ttl or int(os.getenv("CACHE_SHARED_TTL", 24 * 60 * 60))
+
+    async def get(self, key: str):
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes):
+        await self.client.set(key, value, ex=self.ttl)
+
+
+class CatalogCache:
+    """Кеш готовых JSON-ответов, ключи которого включают версию каталога.
+
+    Версия (максимальная метка base.version и число баз) перечитывается не чаще раза в version_ttl секунд.
+    После импорта новая версия дает новые ключи, а записи старой вытесняются по LRU или истекают в общем кеше.
+    Сначала проверяется локальный кеш, затем общий (если задан); найденное в общем кладется в локальный.
+    """
+
+    def __init__(self, version_loader, local: LRUCache = None, shared=None, version_ttl: float = None):
+        self.version_loader = version_loader
+        self.local = local or LRUCache()
+        self.shared = shared
+        self.version_ttl = version_ttl if version_ttl is not None else float(os.getenv("CACHE_VERSION_TTL", 5))
+        self.version = None
+        self._version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, version_loader):
+        url = os.getenv("CACHE_URL")
+        return cls(version_loader, shared=RedisCache(url) if url else None)
+
+    async def get_version(self) -> str:
+        now = time.monotonic()
+        if self.version is None or now - self._version_checked_at >= self.version_ttl:
+            self.version = await self.version_loader()
+            self._version_checked_at = now
+        return self.version
+
+    async def get_or_load(self, name: str, loader, *args) -> bytes:
+        """JSON ответа loader(*args) из кеша; при промахе вызывает loader и сохраняет результат."""
+        key = f"catalog:{await self.get_version()}:{name}:{':'.join(map(str, args))}"
+        value = await self.local.get(key)
+        if value is None and self.shared is not None:
+            value = await self.shared.get(key)
+            if value is not None:
+                await self.local.set(key, value)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = to_json(await loader(*args))
+        await self.local.set(key, value)
+        if self.shared is not None:
+            await self.shared.set(key, value)
+        return value
+
+
+def to_json(value) -> bytes:
+    if isinstance(value, (str, bytes)):
+        # Уже готовый JSON (документ работы)
+        return value.encode() if isinstance(value, str) else value
+    return dumps(value)
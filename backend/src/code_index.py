@@ -0,0 +1,75 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+
+from .versioned import CatalogVersioned
+
+# Порядок видов в выдаче при одинаковом коде
+CODE_KINDS = ('work', 'resource', 'abstract_resource', 'service_resource')
+# Больше любого символа кода: граница диапазона префикса в отсортированном массиве
+_PREFIX_END = '\U0010ffff'
+
+
+def normalize_code(code: str) -> str:
+    """Код для сравнения: без пробелов по краям и внутри, в верхнем регистре (коды вставляют из таблиц)."""
+    return ''.join((code or '').split()).upper()
+
+
+class CodeIndex:
+    """Отсортированный массив кодов работ и ресурсов всех справочников для точного поиска и поиска по префиксу.
+
+    Код ищется двоичным поиском; префикс дает непрерывный диапазон массива. Путь секции от корня
+    берется из словаря секций индекса и запоминается, поэтому ответ не обходит дерево в базе.
+    """
+
+    def __init__(self, section_rows, code_rows):
+        self.sections = {row[0]: tuple(row) for row in section_rows}
+        self._paths = {}
+        entries = sorted(
+            (normalize_code(row[2]), CODE_KINDS.index(row[0]), row[1], row[2], row[3], row[4])
+            for row in code_rows if row[2]
+        )
+        self.keys = [entry[0] for entry in entries]
+        # (вид, id, код, название, id секции) в порядке keys
+        self.entries = [(CODE_KINDS[entry[1]],) + entry[2:] for entry in entries]
+
+    def lookup(self, code: str, prefix: bool = False, limit: int = None):
+        """Записи с кодом code (или начинающимся с него) и путь их секции от корня: [(запись, [строки секций])]."""
+        key = normalize_code(code)
+        if not key:
+            return []
+        start = bisect_left(self.keys, key)
+        end = bisect_left(self.keys, key + _PREFIX_END, start) if prefix else bisect_right(self.keys, key, start)
+        if limit is not None:
+            end = min(end, start + limit)
+        return [(entry, self.section_path(entry[4])) for entry in self.entries[start:end]]
+
+    def section_path(self, section_id):
+        if section_id is None or section_id not in self.sections:
+            return []
+        path = self._paths.get(section_id)
+        if path is None:
+            # Запоминаются пути всех пройденных предков, следующий поиск в той же ветке остановится на них.
+            # Поиск идет в потоках пула: записи только добавляются готовыми кортежами, а одновременный
+            # расчет одного пути лишь повторяет работу
+            chain = []
+            while section_id is not None and section_id not in self._paths:
+                chain.append(section_id)
+                section_id = self.sections[section_id][4]
+            path = self._paths.get(section_id, ())
+            for ancestor_id in reversed(chain):
+                path = path + (self.sections[ancestor_id],)
+                self._paths[ancestor_id] = path
+        return path
+
+
+class CodeIndexEngine(CatalogVersioned):
+    """Держит индекс кодов текущей версии каталога и пересобирает его после импорта."""
+
+    def __init__(self, section_dal, version_loader):
+        super().__init__(version_loader)
+        self.section_dal = section_dal
+
+    async def build(self):
+        section_rows = await self.section_dal.fetch_all_sections()
+        code_rows = await self.section_dal.fetch_code_entries()
+        return await asyncio.to_thread(CodeIndex, section_rows, code_rows)
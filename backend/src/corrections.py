@@ -0,0 +1,53 @@
+import numpy as np
+
+# Колонки цены работы в порядке столбцов массива цен
+PRICE_FIELDS = ('cost', 'salary', 'salary_mach', 'machines', 'materials')
+# Поправки ссылаются на поля атрибутами XML (From="SalaryMach", To="Cost")
+FIELD_INDEX = {
+    **{field: index for index, field in enumerate(PRICE_FIELDS)},
+    'Cost': 0, 'Salary': 1, 'SalaryMach': 2, 'Machines': 3, 'Materials': 4,
+}
+
+
+def apply_corrections(price_rows, correction_rows, coefficients=None):
+    """Применяет поправки ко всем ценам сразу и возвращает массив (id цен, исправленные цены).
+
+    price_rows - строки (id цены, cost, salary, salary_mach, machines, materials, ...), лишние колонки не читаются.
+    correction_rows - строки (id цены, coeff, from_field, to_field).
+    coefficients - необязательные множители по колонкам ({'salary': 1.2}) для пересчета в региональные цены,
+    применяются после поправок.
+
+    Поправка с from_field == to_field умножает поле на коэффициент. Поправка между разными полями
+    добавляет к to_field долю coeff от from_field. Все поправки считаются от исходных цен, поэтому
+    их порядок не важен. Пустое поле остается пустым, а как источник поправки считается нулем.
+    """
+    price_ids = np.fromiter((row[0] for row in price_rows), dtype=np.int64, count=len(price_rows))
+    prices = np.array([row[1:6] for row in price_rows], dtype=np.float64).reshape(len(price_rows), len(PRICE_FIELDS))
+    order = np.argsort(price_ids)
+    price_ids, prices = price_ids[order], prices[order]
+    corrected = prices.copy()
+
+    corrections = [row for row in correction_rows if row[2] in FIELD_INDEX and row[3] in FIELD_INDEX]
+    if corrections and len(price_ids):
+        correction_prices = np.fromiter((row[0] for row in corrections), dtype=np.int64, count=len(corrections))
+        coeffs = np.array([row[1] for row in corrections], dtype=np.float64)
+        sources = np.fromiter((FIELD_INDEX[row[2]] for row in corrections), dtype=np.int64, count=len(corrections))
+        targets = np.fromiter((FIELD_INDEX[row[3]] for row in corrections), dtype=np.int64, count=len(corrections))
+
+        positions = np.minimum(np.searchsorted(price_ids, correction_prices), len(price_ids) - 1)
+        known = price_ids[positions] == correction_prices
+        positions, coeffs, sources, targets = positions[known], coeffs[known], sources[known], targets[known]
+
+        # Умножение поля на coeff - это прибавка (coeff - 1) от него самого
+        source_values = np.nan_to_num(prices[positions, sources])
+        deltas = np.where(sources == targets, coeffs - 1, coeffs) * source_values
+        # add.at суммирует вклады нескольких поправок одной цены в одно поле
+        np.add.at(corrected, (positions, targets), np.nan_to_num(deltas))
+
+    if coefficients:
+        multipliers = np.ones(len(PRICE_FIELDS))
+        for field, coeff in coefficients.items():
+            multipliers[FIELD_INDEX[field]] = coeff
+        corrected *= multipliers
+
+    return price_ids, corrected
@@ -1,6 +1,9 @@
+import io
+
 from fastapi import HTTPException
 
-from .database import Database
+from . import queries
+from .database import Database, CONNECTION_ERRORS
 
 
 class SectionDAL:
@@ -8,53 +11,80 @@ class SectionDAL:
         self.db = db
 
     def fetch_sections(self, substring: str):
-        query = """SELECT * FROM search_all_by_substring(%s)"""
-        return self._execute_query(query, (substring,))
+        return self._execute_query(queries.SECTIONS_BY_SUBSTRING, (substring,))
 
-    def fetch_children(self, parent_id: int):
-        query = """SELECT id, name, type, code, parent_section_id FROM section WHERE parent_section_id = %s ORDER BY 
-        id"""
-        return self._execute_query(query, (parent_id,))
+    def fetch_children(self, parent_id: int, after_id: int = 0, limit: int = None):
+        return self._execute_query(queries.CHILDREN, (parent_id, after_id, limit))
 
     def fetch_root_sections(self):
-        query = """SELECT id, name, type, code, parent_section_id FROM section WHERE parent_section_id IS NULL ORDER 
-        BY id"""
-        return self._execute_query(query)
+        return self._execute_query(queries.ROOT_SECTIONS)
+
+    def fetch_ancestors(self, section_id: int):
+        return self._execute_query(queries.ANCESTORS, (section_id,))
 
-    def fetch_namegroups(self, section_id: int):
-        query = """SELECT id, begin_name FROM name_group WHERE section_id = %s ORDER BY id"""
-        return self._execute_query(query, (section_id,))
+    def fetch_namegroups(self, section_id: int, after_id: int = 0, limit: int = None):
+        return self._execute_query(queries.NAMEGROUPS, (section_id, after_id, limit))
 
-    def fetch_works(self, namegroup_id: int):
-        query = """SELECT id, code, end_name, measure_unit FROM work WHERE name_group_id = %s ORDER BY id"""
-        return self._execute_query(query, (namegroup_id,))
+    def fetch_works(self, namegroup_id: int, after_id: int = 0, limit: int = None):
+        return self._execute_query(queries.WORKS, (namegroup_id, after_id, limit))
 
     def fetch_work_data(self, work_id: int):
-        work_query = """SELECT id, code, end_name, measure_unit, nr, sp FROM work WHERE id = %s"""
-        items_query = """SELECT i.id, i.text FROM item i JOIN work_item wi ON i.id = wi.item_id WHERE wi.work_id = %s"""
-        resources_query = """
-            SELECT wr.resource_id, wr.abstract_resource_id, wr.service_resource_id, wr.quantity, wr.measure_unit,
-                   r.code as resource_code, r.end_name as resource_end_name,
-                   ar.code as abstract_resource_code, ar.name as abstract_resource_name,
-                   sr.code as service_resource_code, sr.name as service_resource_name
-            FROM work_resource wr
-            LEFT JOIN resource r ON wr.resource_id = r.id
-            LEFT JOIN abstract_resource ar ON wr.abstract_resource_id = ar.id
-            LEFT JOIN service_resource sr ON wr.service_resource_id = sr.id
-            WHERE wr.work_id = %s
-        """
-        work_row = self._execute_query(work_query, (work_id,), fetch_one=True)
+        work_row = self._execute_query(queries.WORK, (work_id,), fetch_one=True)
         if not work_row:
             raise HTTPException(status_code=404, detail="Work not found")
 
-        items_rows = self._execute_query(items_query, (work_id,))
-        resources_rows = self._execute_query(resources_query, (work_id,))
+        items_rows = self._execute_query(queries.WORK_ITEMS, (work_id,))
+        resources_rows = self._execute_query(queries.WORK_RESOURCES, (work_id,))
 
         return work_row, items_rows, resources_rows
 
+    def fetch_resource_prices(self, code: str):
+        return self._execute_query(queries.RESOURCE_PRICES, (code,))
+
+    def fetch_estimate_resources(self, work_ids: list):
+        return self._execute_query(queries.ESTIMATE_RESOURCES, (work_ids,))
+
+    def fetch_existing_work_ids(self, work_ids: list):
+        return [row[0] for row in self._execute_query(queries.EXISTING_WORK_IDS, (work_ids,))]
+
+    def fetch_unit_prices(self, codes: list, base_id: int = None):
+        return self._execute_query(queries.UNIT_PRICES, (codes, base_id, base_id))
+
+    def fetch_price_data(self, work_ids: list = None, base_id: int = None):
+        """Цены работ и их поправки по списку работ или по всей базе."""
+        if work_ids is not None:
+            params = (work_ids,)
+            return (self._execute_query(queries.PRICES_BY_WORKS, params),
+                    self._execute_query(queries.CORRECTIONS_BY_WORKS, params))
+        params = (base_id,)
+        return (self._execute_query(queries.PRICES_BY_BASE, params),
+                self._execute_query(queries.CORRECTIONS_BY_BASE, params))
+
+    def replace_corrected_prices(self, base_id: int, rows):
+        """Заменяет материализованные цены базы строками (price_id, work_id, cost, ..., materials) одной транзакцией."""
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join('\\N' if value is None else str(value) for value in (row[0], base_id, *row[1:])))
+            buffer.write('\n')
+        buffer.seek(0)
+        with self.db.connection() as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM corrected_price WHERE base_id = %s", (base_id,))
+            cur.copy_expert("COPY corrected_price (price_id, base_id, work_id, cost, salary, salary_mach, "
+                            "machines, materials) FROM STDIN", buffer)
+
     def _execute_query(self, query: str, params: tuple = (), fetch_one: bool = False):
-        with self.db.conn.cursor() as cur:
-            cur.execute(query, params)
-            if fetch_one:
-                return cur.fetchone()
-            return cur.fetchall()
+        # Чтение безопасно повторить: если соединение разорвалось во время запроса, пул выдаст новое
+        for attempt in range(2):
+            try:
+                with self.db.connection() as conn, conn.cursor() as cur:
+                    cur.execute(query, params)
+                    if fetch_one:
+                        return cur.fetchone()
+                    return cur.fetchall()
+            except CONNECTION_ERRORS as e:
+                if attempt or not self._is_disconnect(e):
+                    raise
+
+    @staticmethod
+    def _is_disconnect(error) -> bool:
+        return error.pgcode is None
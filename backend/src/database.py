@@ -1,25 +1,130 @@
+import asyncpg
 import psycopg2
-from psycopg2.extensions import connection as _connection
+from psycopg2.extensions import connection as _connection, TRANSACTION_STATUS_IDLE
+from psycopg2.pool import ThreadedConnectionPool
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Ошибки, после которых соединение может оказаться разорванным
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
 
 class Database:
-    def __init__(self):
-        self.conn = self.get_db_connection()
+    """Пул соединений: каждый запрос берет свое соединение и возвращает его после завершения транзакции.
+
+    Если все соединения заняты, запрос ждет освобождения, а не получает ошибку пула.
+    Соединение, простоявшее дольше health_check_interval секунд, перед выдачей проверяется запросом SELECT 1;
+    разорванные соединения закрываются и заменяются новыми.
+    """
 
-    def get_db_connection(self) -> _connection:
+    def __init__(self, min_size: int = None, max_size: int = None, health_check_interval: float = None):
+        self.min_size = min_size or int(os.getenv("DB_POOL_MIN_SIZE", 1))
+        self.max_size = max_size or int(os.getenv("DB_POOL_MAX_SIZE", 10))
+        self.health_check_interval = health_check_interval if health_check_interval is not None \
+            else float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", 30))
+        self.pool = self.get_db_pool()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        # id соединения -> время возврата в пул
+        self._returned_at = {}
+
+    def get_db_pool(self) -> ThreadedConnectionPool:
         try:
-            conn = psycopg2.connect(
+            return ThreadedConnectionPool(
+                self.min_size,
+                self.max_size,
                 dbname=os.getenv("DB_NAME"),
                 user=os.getenv("DB_USER"),
                 password=os.getenv("DB_PASSWORD"),
                 host=os.getenv("DB_HOST"),
                 port=os.getenv("DB_PORT")
             )
+        except Exception as e:
+            print(f"Error connecting to the database: {e}")
+            raise
+
+    @contextmanager
+    def connection(self):
+        """Выдает соединение на время блока: при успехе транзакция фиксируется, при ошибке откатывается."""
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+            conn.commit()
+        except Exception:
+            if conn is not None and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if conn is not None:
+                self._checkin(conn)
+            self._slots.release()
+
+    def _checkout(self) -> _connection:
+        conn = self.pool.getconn()
+        if self._is_healthy(conn):
             return conn
+        self.pool.putconn(conn, close=True)
+        self._returned_at.pop(id(conn), None)
+        return self.pool.getconn()
+
+    def _checkin(self, conn: _connection):
+        broken = conn.closed or conn.info.transaction_status != TRANSACTION_STATUS_IDLE
+        if broken:
+            self._returned_at.pop(id(conn), None)
+        else:
+            self._returned_at[id(conn)] = time.monotonic()
+        self.pool.putconn(conn, close=bool(broken))
+
+    def _is_healthy(self, conn: _connection) -> bool:
+        if conn.closed:
+            return False
+        returned_at = self._returned_at.get(id(conn))
+        if returned_at is not None and time.monotonic() - returned_at < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except CONNECTION_ERRORS:
+            return False
+
+    def close(self):
+        self.pool.closeall()
+
+
+class AsyncDatabase:
+    """Пул соединений asyncpg для async-обработчиков: запрос ждет соединение, не занимая поток.
+
+    Пул создается при старте приложения (connect), потому что ему нужен работающий цикл событий.
+    """
+
+    def __init__(self, min_size: int = None, max_size: int = None):
+        self.min_size = min_size or int(os.getenv("DB_ASYNC_POOL_MIN_SIZE", 1))
+        self.max_size = max_size or int(os.getenv("DB_ASYNC_POOL_MAX_SIZE", 20))
+        self.pool = None
+
+    async def connect(self):
+        try:
+            self.pool = await asyncpg.create_pool(
+                database=os.getenv("DB_NAME"),
+                user=os.getenv("DB_USER"),
+                password=os.getenv("DB_PASSWORD"),
+                host=os.getenv("DB_HOST"),
+                port=os.getenv("DB_PORT"),
+                min_size=self.min_size,
+                max_size=self.max_size
+            )
         except Exception as e:
             print(f"Error connecting to the database: {e}")
             raise
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
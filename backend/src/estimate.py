@@ -0,0 +1,70 @@
+import numpy as np
+
+# Виды ресурсов в порядке колонок work_resource (resource_id, abstract_resource_id, service_resource_id)
+RESOURCE_KINDS = ('resource', 'abstract_resource', 'service_resource')
+
+
+def calculate_estimate(lines, resource_rows, price_rows, existing_work_ids):
+    """Раскрывает смету в потребность в ресурсах и стоимость одним векторным проходом.
+
+    lines - пары (work_id, объем); одна работа может встречаться в смете несколько раз.
+    resource_rows - строки (work_id, вид ресурса, id ресурса, количество на единицу работы, код, название,
+    единица измерения) для всех работ сметы; количество None, если в каталоге оно не число.
+    price_rows - пары (код, цена за единицу ресурса).
+    existing_work_ids - id работ сметы, которые есть в каталоге.
+
+    Возвращает словарь массивов по ресурсам сметы (по одной позиции на ресурс) и id работ, которых нет
+    в каталоге. Работа без ресурсов в каталоге есть и отсутствующей не считается.
+    """
+    line_works = np.fromiter((line[0] for line in lines), dtype=np.int64, count=len(lines))
+    line_volumes = np.fromiter((line[1] for line in lines), dtype=np.float64, count=len(lines))
+    # Объемы одной работы из разных строк сметы складываются
+    works, line_index = np.unique(line_works, return_inverse=True)
+    volumes = np.bincount(line_index, weights=line_volumes, minlength=len(works))
+
+    row_count = len(resource_rows)
+    row_works = np.fromiter((row[0] for row in resource_rows), dtype=np.int64, count=row_count)
+    row_kinds = np.fromiter((row[1] for row in resource_rows), dtype=np.int64, count=row_count)
+    row_ids = np.fromiter((row[2] for row in resource_rows), dtype=np.int64, count=row_count)
+    # None (нечисловое количество) превращается в NaN
+    quantities = np.array([row[3] for row in resource_rows], dtype=np.float64)
+
+    amounts = quantities * volumes[np.searchsorted(works, row_works)]
+    unquantified = np.isnan(amounts)
+
+    # Группировка по (вид, id): ключ однозначен, потому что вид занимает младшие разряды
+    groups, first_row, group_index = np.unique(row_ids * len(RESOURCE_KINDS) + row_kinds,
+                                               return_index=True, return_inverse=True)
+    totals = np.bincount(group_index, weights=np.where(unquantified, 0.0, amounts), minlength=len(groups))
+    partial = np.bincount(group_index, weights=unquantified, minlength=len(groups)) > 0
+
+    codes = np.array([resource_rows[row][4] or '' for row in first_row], dtype=str)
+    unit_prices = _join_prices(codes, price_rows)
+    costs = totals * unit_prices
+
+    return {
+        'kinds': row_kinds[first_row],
+        'ids': row_ids[first_row],
+        'codes': codes,
+        'names': [resource_rows[row][5] for row in first_row],
+        'measure_units': [resource_rows[row][6] for row in first_row],
+        'quantities': totals,
+        'unquantified': partial,
+        'unit_prices': unit_prices,
+        'costs': costs,
+        'total_cost': float(np.nansum(costs)),
+        'missing_work_ids': works[~np.isin(works, np.fromiter(existing_work_ids, dtype=np.int64))],
+    }
+
+
+def _join_prices(codes, price_rows):
+    """Цена за единицу для каждого кода или NaN, если кода нет в справочнике цен."""
+    if not price_rows or not len(codes):
+        return np.full(len(codes), np.nan)
+    price_codes = np.array([row[0] for row in price_rows], dtype=str)
+    price_values = np.array([row[1] for row in price_rows], dtype=np.float64)
+    order = np.argsort(price_codes)
+    price_codes, price_values = price_codes[order], price_values[order]
+
+    positions = np.minimum(np.searchsorted(price_codes, codes), len(price_codes) - 1)
+    return np.where(price_codes[positions] == codes, price_values[positions], np.nan)
@@ -0,0 +1,49 @@
+import os
+import re
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Ответы этих путей зависят только от загруженного каталога
+CATALOG_PATHS = re.compile(
+    r"^/(root-sections|children|section/\d+/namegroups|namegroup/\d+/works|work/\d+|tree-snapshot)$")
+
+
+class CatalogETagMiddleware(BaseHTTPMiddleware):
+    """ETag и Cache-Control для ответов дерева каталога по версии загруженных баз.
+
+    ETag одинаков для всех путей и меняется только после импорта, поэтому If-None-Match сверяется
+    с версией каталога до вызова обработчика: на 304 не тратится ни одного запроса к DAL.
+    ETag слабый: байты ответа зависят от Content-Encoding, а содержимое нет.
+    """
+
+    def __init__(self, app, version_loader, max_age: int = None):
+        super().__init__(app)
+        self.version_loader = version_loader
+        self.max_age = max_age if max_age is not None else int(os.getenv("HTTP_CACHE_MAX_AGE", 60))
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method not in ("GET", "HEAD") or not CATALOG_PATHS.match(request.url.path):
+            return await call_next(request)
+        try:
+            etag = f'W/"catalog-{await self.version_loader()}"'
+        except Exception:
+            # Без версии отвечаем как обычно: ошибку базы покажет сам обработчик
+            return await call_next(request)
+
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age}, must-revalidate"}
+        if self._matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        response = await call_next(request)
+        if response.status_code == 200:
+            response.headers.update(headers)
+        return response
+
+    @staticmethod
+    def _matches(if_none_match: str, etag: str) -> bool:
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or etag[2:] in tags
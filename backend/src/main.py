@@ -1,32 +1,91 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
 
+from .async_dal import AsyncSectionDAL
+from .cache import CatalogCache
+from .code_index import CodeIndexEngine
 from .dal import SectionDAL
-from .database import Database
-from .models import Section, NameGroup, Work, WorkDetail
-from .services import SectionService
+from .database import AsyncDatabase, Database
+from .http_cache import CatalogETagMiddleware
+from .models import (Section, NameGroup, NameGroupWithWorks, Work, WorkDetail, CodeMatch, CodeLookupRequest,
+                     CodeLookupResult, ResourcePrice, Estimate, EstimateRequest, CorrectedPrice,
+                     CorrectedPricesRequest, CorrectedPriceRun, PriceCoefficients)
+from .search_index import SearchEngine
+from .serialization import dumps
+from .services import AsyncSectionService, CachedSectionService, SectionService
+from .snapshot import TreeSnapshot, choose_encoding
 
 app = FastAPI()
 templates = Jinja2Templates(directory="templates")
+NEXT_PAGE_HEADER = "X-Next-After-Id"
+PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 5000
+# Пакетные запросы по списку id: ограничение размера массива ANY(%s) в одном запросе к базе
+MAX_BATCH_IDS = 1000
 
 # Initialize dependencies
 db = Database()
 section_dal = SectionDAL(db)
 section_service = SectionService(section_dal)
-
+async_db = AsyncDatabase()
+async_section_dal = AsyncSectionDAL(async_db)
+catalog_cache = CatalogCache.from_env(async_section_dal.fetch_catalog_version)
+search_engine = SearchEngine(async_section_dal, catalog_cache.get_version)
+code_index_engine = CodeIndexEngine(async_section_dal, catalog_cache.get_version)
+async_section_service = AsyncSectionService(async_section_dal, search_engine, code_index_engine)
+cached_section_service = CachedSectionService(async_section_service, catalog_cache)
+tree_snapshot = TreeSnapshot(async_section_service, catalog_cache.get_version)
+
+# Добавленный позже middleware оказывается снаружи: CORS-заголовки получают и ответы 304
+app.add_middleware(CatalogETagMiddleware, version_loader=catalog_cache.get_version)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Allows all origins
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=[NEXT_PAGE_HEADER],
 )
 
 
+@app.on_event("startup")
+async def open_async_database():
+    await async_db.connect()
+    await tree_snapshot.get()
+    await search_engine.get()
+    await code_index_engine.get()
+
+
+@app.on_event("shutdown")
+async def close_database():
+    await async_db.close()
+    db.close()
+
+
+def json_response(content: bytes) -> Response:
+    # Ответ уже сериализован из словарей, поля которых сверены с response_model в serialization.py
+    return Response(content=content, media_type="application/json")
+
+
+def page_bounds(after_id: Optional[int], limit: Optional[int]):
+    # Постраничная выдача включается параметрами: без after_id и limit ответ содержит все строки, как раньше
+    if after_id is None and limit is None:
+        return 0, None
+    return after_id or 0, limit or PAGE_SIZE
+
+
+def page_response(content: bytes, next_after_id: Optional[int]) -> Response:
+    # Тело остается массивом, как до постраничной выдачи; следующая страница запрашивается с after_id из заголовка
+    response = json_response(content)
+    if next_after_id is not None:
+        response.headers[NEXT_PAGE_HEADER] = str(next_after_id)
+    return response
+
+
 # API Endpoints
 @app.get("/", response_class=HTMLResponse)
 def index(request: Request):
@@ -34,48 +93,137 @@ def index(request: Request):
 
 
 @app.get("/search", response_model=List[Section])
-def search_sections(query: str):
+async def search_sections(query: str, limit: int = Query(100, ge=1, le=1000)):
     try:
-        return section_service.get_sections(query)
+        return json_response(dumps(await async_section_service.get_sections(query, limit)))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/children", response_model=List[Section])
-def get_children(parent_id: int):
+async def get_children(parent_id: int, after_id: Optional[int] = None,
+                       limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE)):
     try:
-        return section_service.get_children(parent_id)
+        return page_response(*await cached_section_service.get_children(parent_id, *page_bounds(after_id, limit)))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/root-sections", response_model=List[Section])
-def get_root_sections():
+async def get_root_sections():
+    try:
+        return json_response(await cached_section_service.get_root_sections())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/tree-snapshot", response_model=List[Section])
+async def get_tree_snapshot(request: Request):
     try:
-        return section_service.get_root_sections()
+        payloads = await tree_snapshot.get()
+        encoding = choose_encoding(request.headers.get("accept-encoding"), payloads)
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=payloads[encoding], media_type="application/json", headers=headers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/section/{section_id}/breadcrumbs", response_model=List[Section])
+def get_section_breadcrumbs(section_id: int):
+    try:
+        return section_service.get_breadcrumbs(section_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/section/{section_id}/namegroups", response_model=List[NameGroup])
-def get_section_namegroups(section_id: int):
+async def get_section_namegroups(section_id: int, after_id: Optional[int] = None,
+                                 limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE)):
     try:
-        return section_service.get_namegroups(section_id)
+        return page_response(*await cached_section_service.get_namegroups(section_id, *page_bounds(after_id, limit)))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/namegroup/{namegroup_id}/works", response_model=List[Work])
-def get_namegroup_works(namegroup_id: int):
+async def get_namegroup_works(namegroup_id: int, after_id: Optional[int] = None,
+                              limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE)):
     try:
-        return section_service.get_works(namegroup_id)
+        return page_response(*await cached_section_service.get_works(namegroup_id, *page_bounds(after_id, limit)))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/work/{work_id}", response_model=WorkDetail)
-def get_work_data(work_id: int):
+async def get_work_data(work_id: int):
+    try:
+        return json_response(await cached_section_service.get_work_detail(work_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/sections/namegroups-with-works", response_model=List[NameGroupWithWorks])
+async def get_sections_namegroups_with_works(section_ids: List[int] = Query(..., max_length=MAX_BATCH_IDS)):
+    try:
+        return json_response(dumps(await async_section_service.get_namegroups_with_works(section_ids)))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/works/details", response_model=List[WorkDetail])
+async def get_works_details(ids: List[int] = Query(..., max_length=MAX_BATCH_IDS)):
+    try:
+        return json_response(dumps(await async_section_service.get_work_details(ids)))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/codes", response_model=List[CodeMatch])
+async def lookup_code(code: str, prefix: bool = False, limit: int = Query(20, ge=1, le=1000)):
+    try:
+        return json_response(dumps(await async_section_service.lookup_code(code, prefix, limit)))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/codes/lookup", response_model=List[CodeLookupResult])
+async def lookup_codes(request: CodeLookupRequest):
+    try:
+        return json_response(dumps(await async_section_service.lookup_codes(request.codes, request.prefix,
+                                                                            request.limit)))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/resource/{code}/prices", response_model=List[ResourcePrice])
+def get_resource_prices(code: str):
+    try:
+        return section_service.get_resource_prices(code)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/estimate", response_model=Estimate)
+def calculate_estimate(request: EstimateRequest):
+    try:
+        return section_service.get_estimate(request.lines, request.price_base_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/corrected-prices", response_model=List[CorrectedPrice])
+def get_corrected_prices(request: CorrectedPricesRequest):
+    try:
+        return section_service.get_corrected_prices(request.work_ids, request.coefficients)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/base/{base_id}/corrected-prices", response_model=CorrectedPriceRun)
+def materialize_corrected_prices(base_id: int, coefficients: Optional[PriceCoefficients] = None):
     try:
-        return section_service.get_work_detail(work_id)
+        return section_service.materialize_corrected_prices(base_id, coefficients)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 
@@ -32,6 +32,16 @@ class NameGroup(BaseModel):
         orm_mode = True
 
 
+class NameGroupWithWorks(BaseModel):
+    id: int
+    section_id: int
+    begin_name: str
+    works: List[Work]
+
+    class Config:
+        orm_mode = True
+
+
 class Item(BaseModel):
     id: int
     text: str
@@ -69,3 +79,110 @@ class WorkDetail(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class CodeMatch(BaseModel):
+    kind: str
+    id: int
+    code: str
+    name: Optional[str]
+    section_path: List[Section]
+
+    class Config:
+        orm_mode = True
+
+
+class CodeLookupRequest(BaseModel):
+    codes: List[str] = Field(..., max_length=20000)
+    prefix: bool = False
+    limit: int = Field(20, ge=1, le=1000)
+
+
+class CodeLookupResult(BaseModel):
+    code: str
+    matches: List[CodeMatch]
+
+    class Config:
+        orm_mode = True
+
+
+class ResourcePrice(BaseModel):
+    base_id: int
+    code: str
+    name: Optional[str]
+    measure_unit: Optional[str]
+    cost: Optional[float]
+    opt_cost: Optional[float]
+    salary: Optional[float]
+    salary_mach: Optional[float]
+    machines: Optional[float]
+    materials: Optional[float]
+
+    class Config:
+        orm_mode = True
+
+
+class EstimateLine(BaseModel):
+    work_id: int
+    volume: float
+
+
+class EstimateRequest(BaseModel):
+    lines: List[EstimateLine]
+    price_base_id: Optional[int] = None
+
+
+class EstimateResource(BaseModel):
+    kind: str
+    id: int
+    code: Optional[str]
+    name: Optional[str]
+    measure_unit: Optional[str]
+    quantity: float
+    unquantified: bool
+    unit_price: Optional[float]
+    cost: Optional[float]
+
+    class Config:
+        orm_mode = True
+
+
+class Estimate(BaseModel):
+    resources: List[EstimateResource]
+    total_cost: float
+    missing_work_ids: List[int]
+
+    class Config:
+        orm_mode = True
+
+
+class PriceCoefficients(BaseModel):
+    cost: Optional[float] = None
+    salary: Optional[float] = None
+    salary_mach: Optional[float] = None
+    machines: Optional[float] = None
+    materials: Optional[float] = None
+
+
+class CorrectedPricesRequest(BaseModel):
+    work_ids: List[int]
+    coefficients: Optional[PriceCoefficients] = None
+
+
+class CorrectedPrice(BaseModel):
+    price_id: int
+    work_id: int
+    cost: Optional[float]
+    salary: Optional[float]
+    salary_mach: Optional[float]
+    machines: Optional[float]
+    materials: Optional[float]
+
+    class Config:
+        orm_mode = True
+
+
+class CorrectedPriceRun(BaseModel):
+    base_id: int
+    prices: int
+    corrections: int
@@ -0,0 +1,149 @@
+import re
+from functools import lru_cache
+
+# Запросы, общие для SectionDAL (psycopg2) и AsyncSectionDAL (asyncpg).
+# Параметры записываются в стиле psycopg2 (%s), для asyncpg их переводит to_numbered_params
+
+# Версия каталога для ключей кеша: меняется при импорте базы (base.version), ее добавлении и удалении
+CATALOG_VERSION = """SELECT COALESCE(max(version), 0) || '-' || count(*) FROM base"""
+
+SECTIONS_BY_SUBSTRING = """SELECT * FROM search_all_by_substring(%s)"""
+
+# Страницы по ключу: строки после id = after_id в порядке id; LIMIT NULL отдает все строки
+CHILDREN = """SELECT id, name, type, code, parent_section_id FROM section WHERE parent_section_id = %s AND id > %s 
+ORDER BY id LIMIT %s"""
+
+ROOT_SECTIONS = """SELECT id, name, type, code, parent_section_id FROM section WHERE parent_section_id IS NULL ORDER 
+BY id"""
+
+ALL_SECTIONS = """SELECT id, name, type, code, parent_section_id FROM section ORDER BY id"""
+
+# Предки секции от корня до нее самой по замыканию иерархии
+ANCESTORS = """SELECT s.id, s.name, s.type, s.code, s.parent_section_id FROM section_closure c JOIN section s ON 
+s.id = c.ancestor_id WHERE c.descendant_id = %s ORDER BY c.depth DESC"""
+
+# Тексты для поискового индекса: id секции и название группы или работы
+SEARCH_NAMEGROUP_TEXTS = """SELECT section_id, begin_name FROM name_group"""
+
+SEARCH_WORK_TEXTS = """SELECT ng.section_id, w.end_name FROM work w JOIN name_group ng ON ng.id = w.name_group_id"""
+
+# Коды всех справочников для индекса кодов: вид, id, код, название и секция-владелец.
+# Работа принадлежит секции своей группы, ресурс - секции сборника цен последней базы, где есть его код
+CODE_ENTRIES = """
+    WITH price_section AS (
+        SELECT DISTINCT ON (code) code, section_id FROM resource_price ORDER BY code, base_id DESC
+    )
+    SELECT 'work', w.id, w.code, w.end_name, ng.section_id FROM work w JOIN name_group ng ON ng.id = w.name_group_id
+    UNION ALL
+    SELECT 'resource', r.id, r.code, r.end_name, ps.section_id FROM resource r LEFT JOIN price_section ps USING (code)
+    UNION ALL
+    SELECT 'abstract_resource', ar.id, ar.code, ar.name, ps.section_id
+    FROM abstract_resource ar LEFT JOIN price_section ps USING (code)
+    UNION ALL
+    SELECT 'service_resource', sr.id, sr.code, sr.name, ps.section_id
+    FROM service_resource sr LEFT JOIN price_section ps USING (code)
+"""
+
+NAMEGROUPS = """SELECT id, begin_name FROM name_group WHERE section_id = %s AND id > %s ORDER BY id LIMIT %s"""
+
+WORKS = """SELECT id, code, end_name, measure_unit FROM work WHERE name_group_id = %s AND id > %s ORDER BY id 
+LIMIT %s"""
+
+WORK = """SELECT id, code, end_name, measure_unit, nr, sp FROM work WHERE id = %s"""
+
+# Документ, собранный загрузчиком; ::text, чтобы драйвер отдал строку, а не разобранный JSON
+WORK_DOCUMENT = """SELECT document::text FROM work_document WHERE work_id = %s"""
+
+WORK_ITEMS = """SELECT i.id, i.text FROM item i JOIN work_item wi ON i.id = wi.item_id WHERE wi.work_id = %s"""
+
+_WORK_RESOURCE_COLUMNS = """wr.resource_id, wr.abstract_resource_id, wr.service_resource_id,
+           wr.quantity, wr.measure_unit,
+           r.code as resource_code, r.end_name as resource_end_name,
+           ar.code as abstract_resource_code, ar.name as abstract_resource_name,
+           sr.code as service_resource_code, sr.name as service_resource_name"""
+
+_WORK_RESOURCE_JOINS = """FROM work_resource wr
+    LEFT JOIN resource r ON wr.resource_id = r.id
+    LEFT JOIN abstract_resource ar ON wr.abstract_resource_id = ar.id
+    LEFT JOIN service_resource sr ON wr.service_resource_id = sr.id"""
+
+WORK_RESOURCES = f"""
+    SELECT {_WORK_RESOURCE_COLUMNS}
+    {_WORK_RESOURCE_JOINS}
+    WHERE wr.work_id = %s
+"""
+
+# Пакетные варианты: первая колонка - id работы или родителя, по которому строки раскладываются в ответе
+
+WORKS_BY_IDS = """SELECT id, code, end_name, measure_unit, nr, sp FROM work WHERE id = ANY(%s)"""
+
+WORK_ITEMS_BY_WORKS = """SELECT wi.work_id, i.id, i.text FROM item i JOIN work_item wi ON i.id = wi.item_id 
+WHERE wi.work_id = ANY(%s)"""
+
+WORK_RESOURCES_BY_WORKS = f"""
+    SELECT wr.work_id, {_WORK_RESOURCE_COLUMNS}
+    {_WORK_RESOURCE_JOINS}
+    WHERE wr.work_id = ANY(%s)
+"""
+
+NAMEGROUPS_BY_SECTIONS = """SELECT section_id, id, begin_name FROM name_group WHERE section_id = ANY(%s) 
+ORDER BY section_id, id"""
+
+WORKS_BY_SECTIONS = """SELECT w.name_group_id, w.id, w.code, w.end_name, w.measure_unit FROM work w 
+WHERE w.name_group_id IN (SELECT id FROM name_group WHERE section_id = ANY(%s)) ORDER BY w.name_group_id, w.id"""
+
+
+# Цены ресурса из справочников цен всех баз
+RESOURCE_PRICES = """SELECT base_id, code, name, measure_unit, cost, opt_cost, salary, salary_mach, machines, materials 
+FROM resource_price WHERE code = %s ORDER BY base_id"""
+
+
+# Смета: ресурсы работ с видом (0 - resource, 1 - abstract_resource, 2 - service_resource) и количеством числом
+ESTIMATE_RESOURCES = """
+    SELECT wr.work_id,
+           CASE WHEN wr.resource_id IS NOT NULL THEN 0 WHEN wr.abstract_resource_id IS NOT NULL THEN 1 ELSE 2 
+           END AS kind,
+           COALESCE(wr.resource_id, wr.abstract_resource_id, wr.service_resource_id) AS resource_id,
+           wr.quantity_value,
+           COALESCE(r.code, ar.code, sr.code) AS code,
+           COALESCE(r.end_name, ar.name, sr.name) AS name,
+           wr.measure_unit
+    FROM work_resource wr
+    LEFT JOIN resource r ON wr.resource_id = r.id
+    LEFT JOIN abstract_resource ar ON wr.abstract_resource_id = ar.id
+    LEFT JOIN service_resource sr ON wr.service_resource_id = sr.id
+    WHERE wr.work_id = ANY(%s)
+      AND COALESCE(wr.resource_id, wr.abstract_resource_id, wr.service_resource_id) IS NOT NULL
+"""
+
+EXISTING_WORK_IDS = """SELECT id FROM work WHERE id = ANY(%s)"""
+
+# Цена за единицу по коду; без base_id (NULL) - из последней загруженной базы, в которой есть код
+UNIT_PRICES = """SELECT DISTINCT ON (code) code, cost FROM resource_price WHERE code = ANY(%s) AND cost IS NOT NULL 
+AND (%s::integer IS NULL OR base_id = %s) ORDER BY code, base_id DESC"""
+
+
+# Цены работ и их поправки: по списку работ или по всей базе
+_PRICE_COLUMNS = """p.id, p.cost, p.salary, p.salary_mach, p.machines, p.materials, p.work_id"""
+
+_CORRECTION_COLUMNS = """c.price_id, c.coeff, c.from_field, c.to_field"""
+
+_BASE_WORKS = """SELECT w.id FROM work w JOIN name_group ng ON ng.id = w.name_group_id 
+JOIN section s ON s.id = ng.section_id WHERE s.base_id = %s"""
+
+PRICES_BY_WORKS = f"""SELECT {_PRICE_COLUMNS} FROM price p WHERE p.work_id = ANY(%s)"""
+
+CORRECTIONS_BY_WORKS = f"""SELECT {_CORRECTION_COLUMNS} FROM correction c JOIN price p ON p.id = c.price_id 
+WHERE p.work_id = ANY(%s)"""
+
+PRICES_BY_BASE = f"""SELECT {_PRICE_COLUMNS} FROM price p WHERE p.work_id IN ({_BASE_WORKS})"""
+
+CORRECTIONS_BY_BASE = f"""SELECT {_CORRECTION_COLUMNS} FROM correction c JOIN price p ON p.id = c.price_id 
+WHERE p.work_id IN ({_BASE_WORKS})"""
+
+
+@lru_cache(maxsize=None)
+def to_numbered_params(query: str) -> str:
+    """Переводит параметры %s в нумерованные $1, $2, ... для asyncpg."""
+    counter = iter(range(1, query.count('%s') + 1))
+    return re.sub(r'%s', lambda match: f'${next(counter)}', query)
@@ -0,0 +1,146 @@
+import asyncio
+import re
+import threading
+from array import array
+from collections import OrderedDict
+
+from .versioned import CatalogVersioned
+
+NGRAM = 3
+# Чем меньше, тем выше в выдаче: совпадение в названии секции, затем в группе, затем в работе
+KIND_RANKS = {'section': 0, 'name_group': 1, 'work': 2}
+# Запомненные результаты коротких запросов: число запросов и сколько лучших совпадений хранится для каждого
+SHORT_RESULTS_SIZE = 256
+SHORT_RESULTS_LIMIT = 1000
+_SPACES = re.compile(r'\s+')
+
+
+def fold(text: str) -> str:
+    """Приводит текст к виду для сравнения: регистр, ё как е, одиночные пробелы."""
+    return _SPACES.sub(' ', (text or '').casefold().replace('ё', 'е')).strip()
+
+
+def ngrams(text: str):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class SectionSearchIndex:
+    """Триграммный инвертированный индекс по названиям секций, групп и работ.
+
+    Каждый текст - документ, привязанный к секции. Запрос из NGRAM и более символов сужает кандидатов
+    пересечением списков документов его триграмм, затем совпадение проверяется как подстрока, поэтому
+    результат тот же, что у ILIKE '%query%'. Более короткий запрос проверяется перебором всех документов,
+    а его лучшие SHORT_RESULTS_LIMIT совпадений запоминаются в LRU на SHORT_RESULTS_SIZE запросов: таких запросов
+    немного, и при наборе они повторяются постоянно. Поиск выполняется в потоках пула, LRU защищен блокировкой.
+    """
+
+    def __init__(self, section_rows, namegroup_rows, work_rows):
+        self.sections = {row[0]: tuple(row) for row in section_rows}
+        # Одинаковые тексты (например, окончания названий работ) хранятся одним документом
+        self.texts = []
+        self.doc_ids = {}
+        # Документ -> [(ранг вида, id секции), ...]
+        self.doc_sections = []
+        self.postings = {}
+        self._short_results = OrderedDict()
+        self._short_results_lock = threading.Lock()
+        for kind, rows in (('section', ((row[0], row[1]) for row in section_rows)),
+                           ('name_group', namegroup_rows), ('work', work_rows)):
+            for section_id, text in rows:
+                self._add(section_id, KIND_RANKS[kind], fold(text))
+
+    def _add(self, section_id, kind_rank, text):
+        if not text or section_id not in self.sections:
+            return
+        doc_id = self.doc_ids.get(text)
+        if doc_id is None:
+            doc_id = self.doc_ids[text] = len(self.texts)
+            self.texts.append(text)
+            self.doc_sections.append([])
+            for gram in ngrams(text):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    posting = self.postings[gram] = array('I')
+                posting.append(doc_id)
+        self.doc_sections[doc_id].append((kind_rank, section_id))
+
+    def search(self, query: str, limit: int = None):
+        """Строки найденных секций и всех их предков, лучшие limit совпадений по рангу."""
+        query = fold(query)
+        if not query:
+            return []
+        if len(query) < NGRAM and limit is not None and limit <= SHORT_RESULTS_LIMIT:
+            matched = self._short_result(query)[:limit]
+        else:
+            matched = self._rank(query, limit)
+        return [self.sections[section_id] for section_id in sorted(self._with_ancestors(matched))]
+
+    def _short_result(self, query):
+        with self._short_results_lock:
+            matched = self._short_results.get(query)
+            if matched is not None:
+                self._short_results.move_to_end(query)
+                return matched
+        # Перебор идет без блокировки: одновременные одинаковые запросы лишь посчитают результат дважды
+        matched = self._rank(query, SHORT_RESULTS_LIMIT)
+        with self._short_results_lock:
+            self._short_results[query] = matched
+            if len(self._short_results) > SHORT_RESULTS_SIZE:
+                self._short_results.popitem(last=False)
+        return matched
+
+    def _rank(self, query, limit):
+        """id лучших limit секций с совпадением в порядке ранга."""
+        best = {}
+        for doc_id in self._candidates(query):
+            text = self.texts[doc_id]
+            position = text.find(query)
+            if position < 0:
+                continue
+            position_rank = 0 if position == 0 else 1 if text[position - 1] == ' ' else 2
+            for kind_rank, section_id in self.doc_sections[doc_id]:
+                score = (kind_rank, position_rank, len(text))
+                if section_id not in best or score < best[section_id]:
+                    best[section_id] = score
+
+        return sorted(best, key=lambda section_id: (best[section_id], section_id))[:limit]
+
+    def _candidates(self, query):
+        grams = ngrams(query)
+        if not grams:
+            return range(len(self.texts))
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                return ()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def _with_ancestors(self, section_ids):
+        result = set()
+        for section_id in section_ids:
+            while section_id is not None and section_id not in result:
+                result.add(section_id)
+                section_id = self.sections[section_id][4]
+        return result
+
+
+class SearchEngine(CatalogVersioned):
+    """Держит индекс текущей версии каталога и пересобирает его после импорта."""
+
+    def __init__(self, section_dal, version_loader):
+        super().__init__(version_loader)
+        self.section_dal = section_dal
+
+    async def build(self):
+        section_rows = await self.section_dal.fetch_all_sections()
+        namegroup_rows, work_rows = await self.section_dal.fetch_search_texts()
+        # Построение занимает секунды на полном каталоге, цикл событий на это время не блокируется
+        return await asyncio.to_thread(SectionSearchIndex, section_rows, namegroup_rows, work_rows)
@@ -0,0 +1,51 @@
+import json
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+from .models import Section, NameGroup, Work, Item, WorkResourceData, WorkDetail
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Поля ответов в порядке колонок запросов из queries.py: строка базы превращается в словарь без моделей pydantic
+SECTION_FIELDS = ('id', 'name', 'type', 'code', 'parent_section_id')
+NAMEGROUP_FIELDS = ('id', 'begin_name')
+WORK_FIELDS = ('id', 'code', 'end_name', 'measure_unit')
+WORK_DETAIL_FIELDS = ('id', 'code', 'end_name', 'measure_unit', 'nr', 'sp')
+ITEM_FIELDS = ('id', 'text')
+WORK_RESOURCE_FIELDS = ('resource_id', 'abstract_resource_id', 'service_resource_id', 'quantity', 'measure_unit',
+                        'resource_code', 'resource_end_name', 'abstract_resource_code', 'abstract_resource_name',
+                        'service_resource_code', 'service_resource_name')
+
+
+def check_fields(model, fields):
+    """Сверяет поля быстрого пути с моделью ответа, чтобы словари без проверки не разошлись со схемой API."""
+    if tuple(model.model_fields) != tuple(fields):
+        raise RuntimeError(f"{model.__name__} fields {tuple(model.model_fields)} do not match {tuple(fields)}")
+
+
+# Схема проверяется один раз при импорте, а не на каждой строке каждого ответа
+check_fields(Section, SECTION_FIELDS + ('children',))
+check_fields(NameGroup, NAMEGROUP_FIELDS)
+check_fields(Work, WORK_FIELDS)
+check_fields(Item, ITEM_FIELDS)
+check_fields(WorkResourceData, WORK_RESOURCE_FIELDS)
+check_fields(WorkDetail, WORK_DETAIL_FIELDS + ('items', 'resources'))
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode='json')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    """JSON ответа в байтах: orjson, если установлен, иначе стандартный json с тем же результатом."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
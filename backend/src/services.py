@@ -1,5 +1,15 @@
+import asyncio
+import math
+
+from .async_dal import AsyncSectionDAL
+from .cache import CatalogCache
+from .code_index import CodeIndexEngine
+from .corrections import apply_corrections
 from .dal import SectionDAL
-from .models import Section, NameGroup, Work, WorkDetail, Item, WorkResourceData
+from .estimate import RESOURCE_KINDS, calculate_estimate
+from .models import ResourcePrice, Estimate, EstimateResource, CorrectedPrice, CorrectedPriceRun, PriceCoefficients
+from .search_index import SearchEngine
+from .serialization import dumps, NAMEGROUP_FIELDS, WORK_FIELDS, WORK_DETAIL_FIELDS, ITEM_FIELDS, WORK_RESOURCE_FIELDS
 
 
 class SectionService:
@@ -10,54 +20,159 @@ class SectionService:
         rows = self.section_dal.fetch_sections(substring)
         return self._build_hierarchy(rows)
 
-    def get_children(self, parent_id: int):
-        rows = self.section_dal.fetch_children(parent_id)
-        sections = self._map_sections(rows)
-        for section in sections:
-            section['name'] = self._to_sentence_case(section['name'])
-        return sections
+    def get_children(self, parent_id: int, after_id: int = 0, limit: int = None):
+        """Страница дочерних секций и id, после которого начинается следующая (None, если страница последняя)."""
+        rows = self.section_dal.fetch_children(parent_id, after_id, self._lookahead(limit))
+        rows, next_after_id = self._split_page(rows, limit)
+        return self._map_children(rows), next_after_id
 
     def get_root_sections(self):
         rows = self.section_dal.fetch_root_sections()
         return self._map_sections(rows)
 
-    def get_namegroups(self, section_id: int):
-        rows = self.section_dal.fetch_namegroups(section_id)
-        return [NameGroup(id=row[0], begin_name=row[1]) for row in rows]
+    def get_breadcrumbs(self, section_id: int):
+        rows = self.section_dal.fetch_ancestors(section_id)
+        return self._map_sections(rows)
 
-    def get_works(self, namegroup_id: int):
-        rows = self.section_dal.fetch_works(namegroup_id)
-        return [Work(id=row[0], code=row[1], end_name=row[2], measure_unit=row[3]) for row in rows]
+    def get_namegroups(self, section_id: int, after_id: int = 0, limit: int = None):
+        rows = self.section_dal.fetch_namegroups(section_id, after_id, self._lookahead(limit))
+        rows, next_after_id = self._split_page(rows, limit)
+        return self._map_namegroups(rows), next_after_id
+
+    def get_works(self, namegroup_id: int, after_id: int = 0, limit: int = None):
+        rows = self.section_dal.fetch_works(namegroup_id, after_id, self._lookahead(limit))
+        rows, next_after_id = self._split_page(rows, limit)
+        return self._map_works(rows), next_after_id
 
     def get_work_detail(self, work_id: int):
         work_row, items_rows, resources_rows = self.section_dal.fetch_work_data(work_id)
-        items = [Item(id=row[0], text=row[1]) for row in items_rows]
+        return self._map_work_detail(work_row, items_rows, resources_rows)
+
+    def get_resource_prices(self, code: str):
+        rows = self.section_dal.fetch_resource_prices(code)
+        return [
+            ResourcePrice(
+                base_id=row[0],
+                code=row[1],
+                name=row[2],
+                measure_unit=row[3],
+                cost=row[4],
+                opt_cost=row[5],
+                salary=row[6],
+                salary_mach=row[7],
+                machines=row[8],
+                materials=row[9]
+            )
+            for row in rows
+        ]
+
+    def get_estimate(self, lines, price_base_id: int = None):
+        work_ids = sorted({line.work_id for line in lines})
+        resource_rows = self.section_dal.fetch_estimate_resources(work_ids) if work_ids else []
+        codes = sorted({row[4] for row in resource_rows if row[4]})
+        price_rows = self.section_dal.fetch_unit_prices(codes, price_base_id) if codes else []
+        existing_work_ids = self.section_dal.fetch_existing_work_ids(work_ids) if work_ids else []
+        result = calculate_estimate([(line.work_id, line.volume) for line in lines], resource_rows, price_rows,
+                                    existing_work_ids)
         resources = [
-            WorkResourceData(
-                resource_id=row[0],
-                abstract_resource_id=row[1],
-                service_resource_id=row[2],
-                quantity=row[3],
-                measure_unit=row[4],
-                resource_code=row[5],
-                resource_end_name=row[6],
-                abstract_resource_code=row[7],
-                abstract_resource_name=row[8],
-                service_resource_code=row[9],
-                service_resource_name=row[10]
+            EstimateResource(
+                kind=RESOURCE_KINDS[kind],
+                id=resource_id,
+                code=code or None,
+                name=name,
+                measure_unit=measure_unit,
+                quantity=quantity,
+                unquantified=unquantified,
+                unit_price=self._to_optional(unit_price),
+                cost=self._to_optional(cost)
             )
-            for row in resources_rows
+            for kind, resource_id, code, name, measure_unit, quantity, unquantified, unit_price, cost in zip(
+                result['kinds'].tolist(), result['ids'].tolist(), result['codes'].tolist(), result['names'],
+                result['measure_units'], result['quantities'].tolist(), result['unquantified'].tolist(),
+                result['unit_prices'].tolist(), result['costs'].tolist())
+        ]
+        return Estimate(resources=resources, total_cost=result['total_cost'],
+                        missing_work_ids=result['missing_work_ids'].tolist())
+
+    def get_corrected_prices(self, work_ids, coefficients: PriceCoefficients = None):
+        price_rows, correction_rows = self.section_dal.fetch_price_data(work_ids=work_ids)
+        return [
+            CorrectedPrice(price_id=row[0], work_id=row[1], cost=row[2], salary=row[3], salary_mach=row[4],
+                           machines=row[5], materials=row[6])
+            for row in self._correct_prices(price_rows, correction_rows, coefficients)
+        ]
+
+    def materialize_corrected_prices(self, base_id: int, coefficients: PriceCoefficients = None):
+        price_rows, correction_rows = self.section_dal.fetch_price_data(base_id=base_id)
+        self.section_dal.replace_corrected_prices(
+            base_id, self._correct_prices(price_rows, correction_rows, coefficients))
+        return CorrectedPriceRun(base_id=base_id, prices=len(price_rows), corrections=len(correction_rows))
+
+    def _correct_prices(self, price_rows, correction_rows, coefficients: PriceCoefficients = None):
+        work_ids = {row[0]: row[6] for row in price_rows}
+        price_ids, corrected = apply_corrections(
+            price_rows, correction_rows, coefficients.model_dump(exclude_none=True) if coefficients else None)
+        return [
+            (price_id, work_ids[price_id], *(self._to_optional(value) for value in values))
+            for price_id, values in zip(price_ids.tolist(), corrected.tolist())
+        ]
+
+    @staticmethod
+    def _lookahead(limit):
+        # Строка сверх страницы показывает, есть ли следующая, без отдельного запроса count
+        return None if limit is None else limit + 1
+
+    @staticmethod
+    def _split_page(rows, limit):
+        if limit is None or len(rows) <= limit:
+            return rows, None
+        return rows[:limit], rows[limit - 1][0]
+
+    def _map_children(self, rows):
+        sections = self._map_sections(rows)
+        for section in sections:
+            section['name'] = self._to_sentence_case(section['name'])
+        return sections
+
+    @staticmethod
+    def _map_namegroups(rows):
+        return [dict(zip(NAMEGROUP_FIELDS, row)) for row in rows]
+
+    @staticmethod
+    def _map_works(rows):
+        return [dict(zip(WORK_FIELDS, row)) for row in rows]
+
+    @staticmethod
+    def _map_work_detail(work_row, items_rows, resources_rows):
+        work = dict(zip(WORK_DETAIL_FIELDS, work_row))
+        work['items'] = [dict(zip(ITEM_FIELDS, row)) for row in items_rows]
+        work['resources'] = [dict(zip(WORK_RESOURCE_FIELDS, row)) for row in resources_rows]
+        return work
+
+    def _map_work_details(self, work_ids, work_rows, items_rows, resources_rows):
+        """Собирает детали нескольких работ в порядке запроса; несуществующие id пропускаются."""
+        items = self._group_by_first_column(items_rows)
+        resources = self._group_by_first_column(resources_rows)
+        works = {row[0]: row for row in work_rows}
+        return [
+            self._map_work_detail(works[work_id], items.get(work_id, []), resources.get(work_id, []))
+            for work_id in dict.fromkeys(work_ids) if work_id in works
+        ]
+
+    def _map_namegroups_with_works(self, namegroup_rows, work_rows):
+        works = self._group_by_first_column(work_rows)
+        return [
+            {'id': row[1], 'section_id': row[0], 'begin_name': row[2], 'works': self._map_works(works.get(row[1], []))}
+            for row in namegroup_rows
         ]
-        return WorkDetail(
-            id=work_row[0],
-            code=work_row[1],
-            end_name=work_row[2],
-            measure_unit=work_row[3],
-            nr=work_row[4],
-            sp=work_row[5],
-            items=items,
-            resources=resources
-        )
+
+    @staticmethod
+    def _group_by_first_column(rows):
+        groups = {}
+        for row in rows:
+            row = tuple(row)
+            groups.setdefault(row[0], []).append(row[1:])
+        return groups
 
     def _map_sections(self, rows):
         return [
@@ -84,8 +199,140 @@ class SectionService:
                 sections[parent_id]['children'].append(section)
         return root
 
+    @staticmethod
+    def _to_optional(value: float):
+        return None if math.isnan(value) else value
+
     @staticmethod
     def _to_sentence_case(text: str) -> str:
         if not text:
             return text
         return text[0].upper() + text[1:].lower() if len(text) > 1 else text.upper()
+
+
+class AsyncSectionService(SectionService):
+    """SectionService поверх AsyncSectionDAL: те же ответы, но запросы к базе не блокируют поток."""
+
+    def __init__(self, section_dal: AsyncSectionDAL, search_engine: SearchEngine = None,
+                 code_index_engine: CodeIndexEngine = None):
+        super().__init__(section_dal)
+        self.search_engine = search_engine
+        self.code_index_engine = code_index_engine
+
+    async def get_sections(self, substring: str, limit: int = None):
+        # Без поискового индекса ищет функция search_all_by_substring в базе (без ограничения числа результатов)
+        if self.search_engine is None:
+            rows = await self.section_dal.fetch_sections(substring)
+        else:
+            index = await self.search_engine.get()
+            # Короткий запрос без запомненного результата перебирает все документы: цикл событий не блокируется
+            rows = await asyncio.to_thread(index.search, substring, limit)
+        return self._build_hierarchy(rows)
+
+    async def lookup_code(self, code: str, prefix: bool = False, limit: int = None):
+        index = await self.code_index_engine.get()
+        # Как и поиск по названиям, обращения к индексу выполняются в потоке пула
+        return await asyncio.to_thread(self._lookup_code, index, code, prefix, limit)
+
+    async def lookup_codes(self, codes, prefix: bool = False, limit: int = None):
+        """Поиск списка кодов (например, столбца из таблицы) одним обращением к индексу, в порядке запроса."""
+        index = await self.code_index_engine.get()
+        # Пакет из тысяч кодов не должен задерживать цикл событий
+        return await asyncio.to_thread(self._lookup_codes, index, codes, prefix, limit)
+
+    def _lookup_code(self, index, code, prefix, limit):
+        return self._map_code_matches(index.lookup(code, prefix, limit))
+
+    def _lookup_codes(self, index, codes, prefix, limit):
+        return [{'code': code, 'matches': self._lookup_code(index, code, prefix, limit)} for code in codes]
+
+    def _map_code_matches(self, matches):
+        return [
+            {
+                'kind': entry[0],
+                'id': entry[1],
+                'code': entry[2],
+                'name': entry[3],
+                'section_path': self._map_sections(path)
+            }
+            for entry, path in matches
+        ]
+
+    async def get_children(self, parent_id: int, after_id: int = 0, limit: int = None):
+        rows = await self.section_dal.fetch_children(parent_id, after_id, self._lookahead(limit))
+        rows, next_after_id = self._split_page(rows, limit)
+        return self._map_children(rows), next_after_id
+
+    async def get_root_sections(self):
+        rows = await self.section_dal.fetch_root_sections()
+        return self._map_sections(rows)
+
+    async def get_tree(self):
+        rows = await self.section_dal.fetch_all_sections()
+        return self._build_hierarchy(rows)
+
+    async def get_namegroups(self, section_id: int, after_id: int = 0, limit: int = None):
+        rows = await self.section_dal.fetch_namegroups(section_id, after_id, self._lookahead(limit))
+        rows, next_after_id = self._split_page(rows, limit)
+        return self._map_namegroups(rows), next_after_id
+
+    async def get_works(self, namegroup_id: int, after_id: int = 0, limit: int = None):
+        rows = await self.section_dal.fetch_works(namegroup_id, after_id, self._lookahead(limit))
+        rows, next_after_id = self._split_page(rows, limit)
+        return self._map_works(rows), next_after_id
+
+    async def get_work_document(self, work_id: int):
+        """JSON работы, собранный при импорте, или None, если документа нет (база загружена до его появления)."""
+        return await self.section_dal.fetch_work_document(work_id)
+
+    async def get_work_detail(self, work_id: int):
+        work_row, items_rows, resources_rows = await self.section_dal.fetch_work_data(work_id)
+        return self._map_work_detail(work_row, items_rows, resources_rows)
+
+    async def get_work_details(self, work_ids):
+        work_rows, items_rows, resources_rows = await self.section_dal.fetch_works_data(work_ids)
+        return self._map_work_details(work_ids, work_rows, items_rows, resources_rows)
+
+    async def get_namegroups_with_works(self, section_ids):
+        namegroup_rows, work_rows = await self.section_dal.fetch_namegroups_with_works(section_ids)
+        return self._map_namegroups_with_works(namegroup_rows, work_rows)
+
+
+class CachedSectionService:
+    """Кеш перед AsyncSectionService для навигации по дереву: методы возвращают готовый JSON ответа."""
+
+    def __init__(self, section_service: AsyncSectionService, cache: CatalogCache):
+        self.section_service = section_service
+        self.cache = cache
+
+    async def get_root_sections(self):
+        return await self.cache.get_or_load('root_sections', self.section_service.get_root_sections)
+
+    async def get_children(self, parent_id: int, after_id: int = 0, limit: int = None):
+        return await self._get_page('children', self.section_service.get_children, parent_id, after_id, limit)
+
+    async def get_namegroups(self, section_id: int, after_id: int = 0, limit: int = None):
+        return await self._get_page('namegroups', self.section_service.get_namegroups, section_id, after_id, limit)
+
+    async def get_works(self, namegroup_id: int, after_id: int = 0, limit: int = None):
+        return await self._get_page('works', self.section_service.get_works, namegroup_id, after_id, limit)
+
+    async def _get_page(self, name: str, loader, *args):
+        """JSON страницы и курсор следующей. В кеше курсор хранится первой строкой перед JSON страницы."""
+        async def load_page(*page_args):
+            items, next_after_id = await loader(*page_args)
+            cursor = b'' if next_after_id is None else str(next_after_id).encode()
+            return cursor + b'\n' + dumps(items)
+
+        value = await self.cache.get_or_load(name, load_page, *args)
+        cursor, _, body = value.partition(b'\n')
+        return body, int(cursor) if cursor else None
+
+    async def get_work_detail(self, work_id: int):
+        return await self.cache.get_or_load('work', self._load_work_detail, work_id)
+
+    async def _load_work_detail(self, work_id: int):
+        document = await self.section_service.get_work_document(work_id)
+        if document is not None:
+            return document
+        return await self.section_service.get_work_detail(work_id)
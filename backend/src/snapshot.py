@@ -0,0 +1,48 @@
+import asyncio
+import gzip
+
+from .cache import to_json
+from .versioned import CatalogVersioned
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class TreeSnapshot(CatalogVersioned):
+    """Все дерево секций одним заранее сжатым JSON для первой отрисовки TreeView.
+
+    Снимок строится при старте приложения и пересобирается, когда меняется версия каталога;
+    между импортами запрос отдает готовые байты без обращений к базе.
+    get() возвращает сжатые варианты снимка: {'identity': ..., 'gzip': ..., 'br': ...}.
+    """
+
+    def __init__(self, section_service, version_loader):
+        super().__init__(version_loader)
+        self.section_service = section_service
+
+    async def build(self):
+        tree = await self.section_service.get_tree()
+        # Сжатие большого JSON занимает заметное время, цикл событий на это время не блокируется
+        return await asyncio.to_thread(self._compress, to_json(tree))
+
+    @staticmethod
+    def _compress(body: bytes) -> dict:
+        payloads = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            payloads['br'] = brotli.compress(body, quality=11)
+        return payloads
+
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """Лучшее из доступных сжатий, которое принимает клиент: br, затем gzip, иначе без сжатия."""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(name.strip().lower())
+    for encoding in ('br', 'gzip'):
+        if encoding in available and (encoding in accepted or '*' in accepted):
+            return encoding
+    return 'identity'
@@ -0,0 +1,30 @@
+import asyncio
+from abc import ABC, abstractmethod
+
+
+class CatalogVersioned(ABC):
+    """Значение, построенное по данным каталога и пересобираемое, когда меняется версия каталога.
+
+    Первый запрос новой версии ждет построения; пока оно идет, остальные запросы получают прежнее значение.
+    """
+
+    def __init__(self, version_loader):
+        self.version_loader = version_loader
+        self.version = None
+        self.value = None
+        self._lock = asyncio.Lock()
+
+    async def get(self):
+        version = await self.version_loader()
+        if version != self.version:
+            if self.value is not None and self._lock.locked():
+                return self.value
+            async with self._lock:
+                if version != self.version:
+                    self.value = await self.build()
+                    self.version = version
+        return self.value
+
+    @abstractmethod
+    async def build(self):
+        """Строит значение по текущим данным каталога."""
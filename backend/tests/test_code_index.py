@@ -0,0 +1,58 @@
+from src.code_index import CodeIndex, normalize_code
+
+# (id, название, тип, код, id родителя)
+SECTION_ROWS = [
+    (1, 'Земляные работы', 'Сборник', '01', None),
+    (2, 'Разработка грунта', 'Отдел', '01-01', 1),
+]
+# (вид, id, код, название, id секции)
+CODE_ROWS = [
+    ('work', 12, '01-01-001-02', 'Работа 2', 2),
+    ('work', 11, '01-01-001-01', 'Работа 1', 2),
+    ('resource', 5, '01-01-001', 'Ресурс', None),
+    ('work', 10, '01-01-001', 'Работа', 2),
+    ('service_resource', 6, '', 'Без кода', None),
+]
+
+
+def make_index():
+    return CodeIndex(SECTION_ROWS, CODE_ROWS)
+
+
+def codes(result):
+    return [entry[2] for entry, path in result]
+
+
+def test_normalize_code():
+    assert normalize_code(' 01-01-001 -01\t') == '01-01-001-01'
+    assert normalize_code('ф01') == 'Ф01'
+    assert normalize_code(None) == ''
+
+
+def test_exact_lookup():
+    result = make_index().lookup('01-01-001')
+    # При одинаковом коде работа идет раньше ресурса
+    assert [entry[:2] for entry, path in result] == [('work', 10), ('resource', 5)]
+
+
+def test_prefix_lookup():
+    index = make_index()
+    assert codes(index.lookup(' 01-01-001', prefix=True)) == ['01-01-001', '01-01-001', '01-01-001-01', '01-01-001-02']
+    assert codes(index.lookup('01-01-001', prefix=True, limit=3)) == ['01-01-001', '01-01-001', '01-01-001-01']
+
+
+def test_lookup_without_matches():
+    index = make_index()
+    assert index.lookup('') == []
+    assert index.lookup('  ') == []
+    assert index.lookup('02') == []
+    assert index.lookup('01-01-001-0') == []
+
+
+def test_section_path():
+    index = make_index()
+    entry, path = index.lookup('01-01-001-01')[0]
+    assert [row[0] for row in path] == [1, 2]
+    assert index.section_path(1) == (SECTION_ROWS[0],)
+    assert index.section_path(None) == []
+    assert index.section_path(99) == []
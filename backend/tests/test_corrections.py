@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.corrections import apply_corrections
+
+# (id цены, cost, salary, salary_mach, machines, materials)
+PRICE_ROWS = [
+    (2, 200.0, 20.0, 2.0, 10.0, 50.0),
+    (1, 100.0, 10.0, 1.0, 5.0, None),
+]
+
+
+def test_prices_are_sorted_by_id():
+    price_ids, corrected = apply_corrections(PRICE_ROWS, [])
+    assert price_ids.tolist() == [1, 2]
+    assert corrected[1].tolist() == [200.0, 20.0, 2.0, 10.0, 50.0]
+
+
+def test_correction_of_a_field_by_itself_multiplies_it():
+    _, corrected = apply_corrections(PRICE_ROWS, [(1, 1.5, 'salary', 'salary')])
+    assert corrected[0][1] == 15.0
+    assert corrected[1][1] == 20.0
+
+
+def test_correction_between_fields_adds_a_share_of_the_source():
+    _, corrected = apply_corrections(PRICE_ROWS, [(2, 0.5, 'SalaryMach', 'Cost')])
+    assert corrected[1][0] == 201.0
+    assert corrected[1][2] == 2.0
+
+
+def test_corrections_are_computed_from_original_prices():
+    corrections = [(1, 2.0, 'salary', 'salary'), (1, 1.0, 'salary', 'cost')]
+    _, corrected = apply_corrections(PRICE_ROWS, corrections)
+    _, reversed_order = apply_corrections(PRICE_ROWS, corrections[::-1])
+    # Прибавка к cost считается от исходной salary, а не от удвоенной
+    assert corrected[0][:2].tolist() == [110.0, 20.0]
+    np.testing.assert_array_equal(reversed_order, corrected)
+
+
+def test_empty_field_stays_empty_and_counts_as_zero():
+    corrections = [(1, 2.0, 'materials', 'materials'), (1, 1.0, 'materials', 'cost')]
+    _, corrected = apply_corrections(PRICE_ROWS, corrections)
+    assert math.isnan(corrected[0][4])
+    assert corrected[0][0] == 100.0
+
+
+def test_unknown_fields_and_prices_are_ignored():
+    corrections = [(1, 2.0, 'Unknown', 'cost'), (3, 2.0, 'cost', 'cost')]
+    _, corrected = apply_corrections(PRICE_ROWS, corrections)
+    _, original = apply_corrections(PRICE_ROWS, [])
+    np.testing.assert_array_equal(corrected[1], original[1])
+    assert corrected[0][0] == 100.0
+
+
+def test_coefficients_apply_after_corrections():
+    _, corrected = apply_corrections(PRICE_ROWS, [(1, 2.0, 'salary', 'salary')], {'salary': 1.5})
+    assert corrected[0][1] == pytest.approx(30.0)
+    assert corrected[0][0] == 100.0
+
+
+def test_no_prices():
+    price_ids, corrected = apply_corrections([], [(1, 2.0, 'cost', 'cost')])
+    assert price_ids.tolist() == []
+    assert corrected.shape == (0, 5)
@@ -0,0 +1,89 @@
+import pytest
+
+from migrate_xml_to_pg.delta import DeltaCatalogImporter
+from migrate_xml_to_pg.identity_cache import IdentityCache
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        self.connection.queries.append(query)
+        if query.startswith('SELECT nextval'):
+            count = params[1]
+            self.rows = [(self.connection.next_id + i,) for i in range(count)]
+            self.connection.next_id += count
+
+    def fetchall(self):
+        return self.rows
+
+    def copy_expert(self, query, stream):
+        self.connection.copied.append(query)
+
+
+class FakeConnection:
+    """Соединение без базы: запоминает запросы и выдает id последовательностей по порядку."""
+
+    def __init__(self):
+        self.queries = []
+        self.copied = []
+        self.next_id = 100
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+@pytest.fixture
+def importer():
+    importer = DeltaCatalogImporter(FakeConnection(), cache=IdentityCache())
+    importer.base_id = 1
+    importer.known = {
+        ('section', '01'): (11, 1, 'fp-section'),
+        ('work', '01/001'): (12, 2, 'fp-work'),
+        ('work', '01/002'): (13, 3, 'fp-work'),
+    }
+    return importer
+
+
+def test_unchanged_node_is_skipped(importer):
+    assert importer.store('section', '01', 'fp-section', {'name': 'a', 'type': None, 'code': '01'}) == (1, False)
+    assert importer.change_counts['unchanged'] == 1
+    assert importer.connection.queries == []
+
+
+def test_changed_section_is_updated_in_place(importer):
+    values = {'name': 'b', 'type': None, 'code': '01'}
+    assert importer.store('section', '01', 'fp-new', values) == (1, False)
+    assert importer.change_counts['updated'] == 1
+    assert importer.connection.queries[0].startswith('UPDATE section SET')
+
+
+def test_changed_work_is_rewritten(importer):
+    values = {'code': '001', 'end_name': 'a', 'measure_unit': 'м', 'nr': None, 'sp': None}
+    assert importer.store('work', '01/001', 'fp-new', values) == (2, True)
+    assert importer.change_counts['updated'] == 1
+    assert any(query.startswith('DELETE FROM price') for query in importer.connection.queries)
+
+
+def test_new_node_is_inserted(importer):
+    row_id, written = importer.store('section', '02', 'fp-section', {'name': 'c', 'type': None, 'code': '02'})
+    assert written
+    assert row_id == 100
+    assert importer.change_counts['inserted'] == 1
+
+
+def test_finish_counts_missing_nodes_as_deleted(importer):
+    importer.store('section', '01', 'fp-section', {'name': 'a', 'type': None, 'code': '01'})
+    importer.store('work', '01/001', 'fp-work', {})
+    importer.finish()
+    assert importer.change_counts == {'unchanged': 2, 'updated': 0, 'inserted': 0, 'deleted': 1}
+    assert importer.metrics.details['delta'] == importer.change_counts
+    assert 'DELETE FROM work WHERE id = ANY(%s)' in importer.connection.queries
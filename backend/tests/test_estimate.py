@@ -0,0 +1,53 @@
+import math
+
+from src.estimate import calculate_estimate
+
+# (work_id, вид ресурса, id ресурса, количество, код, название, единица измерения)
+RESOURCE_ROWS = [
+    (1, 0, 10, 1.5, 'A', 'Ресурс A', 'т'),
+    (2, 0, 10, 0.5, 'A', 'Ресурс A', 'т'),
+    (2, 1, 10, 2.0, 'B', 'Ресурс B', 'шт'),
+    (2, 2, 20, None, 'C', 'Ресурс C', 'маш.-ч'),
+]
+PRICE_ROWS = [('A', 100.0), ('B', 10.0)]
+
+
+def test_volumes_of_one_work_are_summed():
+    result = calculate_estimate([(1, 1.0), (1, 1.0)], RESOURCE_ROWS[:1], PRICE_ROWS, [1])
+    assert result['quantities'].tolist() == [3.0]
+    assert result['total_cost'] == 300.0
+
+
+def test_resources_are_grouped_by_kind_and_id():
+    result = calculate_estimate([(1, 2.0), (2, 1.0)], RESOURCE_ROWS, PRICE_ROWS, [1, 2])
+    entries = {(int(kind), int(resource_id)): (quantity, cost)
+               for kind, resource_id, quantity, cost
+               in zip(result['kinds'], result['ids'], result['quantities'], result['costs'])}
+    # Одинаковый id у ресурсов разных видов - разные позиции сметы
+    assert entries[(0, 10)] == (3.5, 350.0)
+    assert entries[(1, 10)] == (2.0, 20.0)
+    assert result['total_cost'] == 370.0
+
+
+def test_unquantified_and_unpriced_resources():
+    result = calculate_estimate([(2, 1.0)], RESOURCE_ROWS[1:], PRICE_ROWS, [2])
+    position = result['codes'].tolist().index('C')
+    assert result['unquantified'][position]
+    assert result['quantities'][position] == 0.0
+    assert math.isnan(result['unit_prices'][position])
+    assert not result['unquantified'][result['codes'].tolist().index('A')]
+    assert result['total_cost'] == 70.0
+
+
+def test_missing_works():
+    result = calculate_estimate([(1, 2.0), (2, 1.0), (3, 1.0)], RESOURCE_ROWS[:1], PRICE_ROWS, [1, 2])
+    # Работа 2 есть в каталоге без ресурсов и отсутствующей не считается
+    assert result['missing_work_ids'].tolist() == [3]
+    assert result['total_cost'] == 300.0
+
+
+def test_empty_estimate():
+    result = calculate_estimate([], [], [], [])
+    assert result['missing_work_ids'].tolist() == []
+    assert result['quantities'].tolist() == []
+    assert result['total_cost'] == 0.0
@@ -0,0 +1,35 @@
+from lxml import etree
+
+from migrate_xml_to_pg.fingerprint import fingerprint
+
+
+def test_attribute_order_does_not_matter():
+    first = etree.fromstring('<Work Code="01-01-001" EndName="a" />')
+    second = etree.fromstring('<Work EndName="a" Code="01-01-001" />')
+    assert fingerprint(first) == fingerprint(second)
+
+
+def test_attribute_value_changes_fingerprint():
+    first = etree.fromstring('<Work Code="01-01-001" EndName="a" />')
+    second = etree.fromstring('<Work Code="01-01-001" EndName="b" />')
+    assert fingerprint(first) != fingerprint(second)
+
+
+def test_shallow_fingerprint_ignores_children():
+    first = etree.fromstring('<Work Code="1"><Price Cost="10" /></Work>')
+    second = etree.fromstring('<Work Code="1"><Price Cost="20" /></Work>')
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first, deep=True) != fingerprint(second, deep=True)
+
+
+def test_deep_fingerprint_ignores_comments():
+    first = etree.fromstring('<Work Code="1"><!-- comment --><Price Cost="10" /></Work>')
+    second = etree.fromstring('<Work Code="1"><Price Cost="10" /></Work>')
+    assert fingerprint(first, deep=True) == fingerprint(second, deep=True)
+
+
+def test_deep_fingerprint_keeps_nesting():
+    # Одни и те же элементы на разной глубине дают разные отпечатки
+    nested = etree.fromstring('<Work><A><B /></A></Work>')
+    flat = etree.fromstring('<Work><A /><B /></Work>')
+    assert fingerprint(nested, deep=True) != fingerprint(flat, deep=True)
@@ -0,0 +1,71 @@
+from src import search_index
+from src.search_index import SectionSearchIndex, fold, ngrams
+
+# (id, название, тип, код, id родителя)
+SECTION_ROWS = [
+    (1, 'Земляные работы', 'Сборник', '01', None),
+    (2, 'Разработка грунта', 'Отдел', '01-01', 1),
+    (3, 'Бетонные работы', 'Сборник', '06', None),
+    (4, 'Ёмкости и резервуары', 'Отдел', '06-01', 3),
+]
+NAMEGROUP_ROWS = [(2, 'Разработка грунта экскаватором')]
+WORK_ROWS = [(2, 'с погрузкой на автомобили'), (4, 'объемом до 100 м3'), (4, 'с погрузкой')]
+
+
+def make_index():
+    return SectionSearchIndex(SECTION_ROWS, NAMEGROUP_ROWS, WORK_ROWS)
+
+
+def section_ids(rows):
+    return [row[0] for row in rows]
+
+
+def test_fold():
+    assert fold('  ЁМКОСТИ\tи   Резервуары ') == 'емкости и резервуары'
+    assert fold(None) == ''
+
+
+def test_ngrams():
+    assert ngrams('грунт') == {'гру', 'рун', 'унт'}
+    assert ngrams('гр') == set()
+
+
+def test_search_folds_the_query():
+    assert section_ids(make_index().search('емкости')) == [3, 4]
+    assert section_ids(make_index().search('ЁМКОСТИ')) == [3, 4]
+
+
+def test_search_returns_ancestors():
+    assert section_ids(make_index().search('экскаватор')) == [1, 2]
+
+
+def test_search_ranks_by_kind():
+    index = make_index()
+    # Совпадение в названии секции выше совпадения в работе
+    assert section_ids(index.search('работ', limit=1)) == [1]
+    # При равном виде и позиции выше более короткий текст
+    assert section_ids(index.search('погрузкой', limit=1)) == [3, 4]
+
+
+def test_search_without_matches():
+    index = make_index()
+    assert index.search('') == []
+    assert index.search('   ') == []
+    assert index.search('кирпич') == []
+
+
+def test_short_query():
+    index = make_index()
+    assert section_ids(index.search('м3', limit=10)) == [3, 4]
+    assert section_ids(index.search('м3', limit=10)) == [3, 4]
+    # Без limit короткий запрос не запоминается
+    assert section_ids(index.search('м3')) == [3, 4]
+    assert list(index._short_results) == ['м3']
+
+
+def test_short_results_are_bounded(monkeypatch):
+    monkeypatch.setattr(search_index, 'SHORT_RESULTS_SIZE', 2)
+    index = make_index()
+    for query in ('з', 'р', 'б', 'р'):
+        index.search(query, limit=10)
+    assert list(index._short_results) == ['б', 'р']